@@ -1090,8 +1090,22 @@ def handle_wiki_command(args: str, log) -> bool:
         print(f"\n🤔 Asking: {question}\n")
         
         try:
-            answer = ask(question)
-            print(answer.formatted())
+            # Stream the answer as it is generated, then add citations
+            streamed = []
+            
+            def show(piece):
+                streamed.append(piece)
+                print(piece, end="", flush=True)
+            
+            answer = ask(question, on_token=show)
+            if not streamed:
+                print(answer.formatted())
+            elif answer.error:
+                print(f"\n\n❌ {answer.error}")
+            elif answer.citations:
+                print(f"\n\n{answer.citations}")
+            else:
+                print()
             print()
             
             if log:
@@ -7,8 +7,11 @@ Data directory layout:
 
 This lets you keep runtime/personal data outside of git (e.g. in /personal-data/).
 """
+import atexit
 import os
 import sqlite3
+import sys
+import threading
 from pathlib import Path
 from contextlib import contextmanager
 
@@ -372,6 +375,7 @@ CREATE TABLE IF NOT EXISTS skills (
     triggers TEXT,                       -- JSON array of trigger patterns
     dependencies TEXT,                   -- JSON array of skill names
     requires_approval INTEGER DEFAULT 0, -- 1 if skill can execute code/web
+    content_hash TEXT,                   -- Hash of the registered metadata (skip no-op updates)
     enabled INTEGER DEFAULT 1,
     last_used TIMESTAMP,
     use_count INTEGER DEFAULT 0,
@@ -417,6 +421,7 @@ CREATE TABLE IF NOT EXISTS sources (
     author TEXT,
     file_hash TEXT,                       -- SHA-256 hash to detect changes
     file_size_bytes INTEGER,
+    file_mtime_ns INTEGER,                -- Lets verify skip re-hashing untouched files
     trust_level INTEGER DEFAULT 1,        -- 1=personal, 2=curated, 3=web
     status TEXT DEFAULT 'pending'         -- 'pending', 'processing', 'indexed', 'failed', 'changed'
         CHECK(status IN ('pending', 'processing', 'indexed', 'failed', 'changed')),
@@ -438,6 +443,7 @@ CREATE TABLE IF NOT EXISTS knowledge_chunks (
     token_count INTEGER,                  -- Approximate token count
     start_char INTEGER,                   -- Character offset in source
     end_char INTEGER,
+    content_simhash INTEGER,              -- 64-bit SimHash for near-duplicate filtering
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -445,8 +451,11 @@ CREATE TABLE IF NOT EXISTS knowledge_chunks (
 CREATE INDEX IF NOT EXISTS idx_sources_status ON sources(status);
 CREATE INDEX IF NOT EXISTS idx_sources_trust ON sources(trust_level);
 CREATE INDEX IF NOT EXISTS idx_sources_file_path ON sources(file_path);
-CREATE INDEX IF NOT EXISTS idx_chunks_source ON knowledge_chunks(source_id);
-CREATE INDEX IF NOT EXISTS idx_chunks_chunk_id ON knowledge_chunks(chunk_id);
+-- (source_id, chunk_index) serves both source lookups and their ordering;
+-- chunk_id is already indexed by its UNIQUE constraint
+CREATE INDEX IF NOT EXISTS idx_chunks_source_index ON knowledge_chunks(source_id, chunk_index);
+DROP INDEX IF EXISTS idx_chunks_source;
+DROP INDEX IF EXISTS idx_chunks_chunk_id;
 
 -- v0.9.1: Feedback sessions (Butler-driven task disambiguation)
 CREATE TABLE IF NOT EXISTS feedback_sessions (
@@ -480,27 +489,100 @@ CREATE INDEX IF NOT EXISTS idx_feedback_questions_session ON feedback_questions(
 """
 
 
+_local = threading.local()  # per-thread connection and the DB_PATH it points at
+
+
 def get_connection() -> sqlite3.Connection:
-    """Get a database connection with row factory enabled."""
+    """Get this thread's database connection, with row factory enabled.
+    
+    Each thread opens one connection and reuses it for every get_db()
+    block, so the connect and PRAGMA setup is paid once per thread rather
+    than per query. A new connection is opened if DB_PATH has changed.
+    The connection runs in autocommit mode; get_db() brackets each block
+    in a savepoint.
+    
+    detect_types is deliberately left off: DATE/TIME/TIMESTAMP columns come
+    back as ISO strings, which callers rely on, and the models' from_row
+    methods convert the fields they type (sqlite3's built-in timestamp
+    converter is also deprecated since Python 3.12).
+    
+    The database runs in WAL mode: the bot, web dashboard and slow loop
+    read while another writes, and a commit appends to the log instead of
+    syncing the main file (synchronous=NORMAL is safe under WAL).
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == DB_PATH:
+        return conn
+    close_connection()
+    
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(DB_PATH))
+    conn = sqlite3.connect(str(DB_PATH), isolation_level=None)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -20000")  # 20 MB, kept warm between blocks
+    conn.execute("PRAGMA mmap_size = 268435456")
+    _local.conn = conn
+    _local.path = DB_PATH
     return conn
 
 
+def close_connection():
+    """Close this thread's connection, if it has one."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        _local.conn = None
+        conn.close()
+
+
+atexit.register(close_connection)
+
+
 @contextmanager
 def get_db():
-    """Context manager for database connections."""
+    """Context manager for a transaction on this thread's connection.
+    
+    Blocks may nest: each one is a savepoint, so an inner block that fails
+    rolls back only its own changes. executescript() commits whatever is
+    pending first, after which there is no savepoint left to release.
+    """
     conn = get_connection()
+    conn.execute("SAVEPOINT get_db")
     try:
         yield conn
-        conn.commit()
-    except Exception:
-        conn.rollback()
+        if conn.in_transaction:
+            conn.execute("RELEASE get_db")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK TO get_db")
+            conn.execute("RELEASE get_db")
         raise
-    finally:
-        conn.close()
+
+
+# v0.9.1: Full-text index over wiki chunks (BM25 half of hybrid search).
+# External-content FTS5 table kept in sync with knowledge_chunks by triggers.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS knowledge_chunks_fts USING fts5(
+    content, content='knowledge_chunks', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS knowledge_chunks_fts_ai AFTER INSERT ON knowledge_chunks BEGIN
+    INSERT INTO knowledge_chunks_fts(rowid, content) VALUES (new.id, new.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS knowledge_chunks_fts_ad AFTER DELETE ON knowledge_chunks BEGIN
+    INSERT INTO knowledge_chunks_fts(knowledge_chunks_fts, rowid, content)
+    VALUES ('delete', old.id, old.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS knowledge_chunks_fts_au AFTER UPDATE OF content ON knowledge_chunks BEGIN
+    INSERT INTO knowledge_chunks_fts(knowledge_chunks_fts, rowid, content)
+    VALUES ('delete', old.id, old.content);
+    INSERT INTO knowledge_chunks_fts(rowid, content) VALUES (new.id, new.content);
+END;
+"""
 
 
 def init_db():
@@ -510,6 +592,7 @@ def init_db():
     
     # Run migrations for existing databases
     _migrate_db()
+    _init_fts()
     
     print(f"Database initialized at {DB_PATH}")
 
@@ -531,6 +614,12 @@ def _migrate_db():
         ("thoughts", "summon_mode", "INTEGER DEFAULT 0"),
         # v0.7.0: Add project_id to execution_logs for project-level trace linking
         ("execution_logs", "project_id", "INTEGER REFERENCES projects(id)"),
+        # Wiki: mtime recorded alongside the hash so unchanged files aren't re-hashed
+        ("sources", "file_mtime_ns", "INTEGER"),
+        # Wiki: SimHash computed at ingest so duplicate chunks can be dropped from context
+        ("knowledge_chunks", "content_simhash", "INTEGER"),
+        # Skills: hash of registered metadata so rediscovery skips unchanged rows
+        ("skills", "content_hash", "TEXT"),
     ]
     
     with get_db() as conn:
@@ -548,11 +637,36 @@ def _migrate_db():
                     pass
 
 
+def _init_fts():
+    """Create the wiki full-text index, backfilling it for existing chunks."""
+    with get_db() as conn:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'knowledge_chunks_fts'"
+        ).fetchone()
+        try:
+            conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: wiki search stays dense-only
+            return
+        if not exists:
+            conn.execute("INSERT INTO knowledge_chunks_fts(knowledge_chunks_fts) VALUES ('rebuild')")
+
+
 def reset_db():
     """Drop all tables and reinitialize. USE WITH CAUTION."""
-    if DB_PATH.exists():
-        DB_PATH.unlink()
+    close_connection()
+    # Remove the WAL sidecars too, so a stale log is never replayed into the new file
+    for path in (DB_PATH, DB_PATH.with_name(DB_PATH.name + "-wal"),
+                 DB_PATH.with_name(DB_PATH.name + "-shm")):
+        if path.exists():
+            path.unlink()
     init_db()
+    
+    # Wiki stats cached before the reset describe the old file (only if the
+    # wiki was ever loaded; importing it here would pull in numpy for nothing)
+    retrieval = sys.modules.get("noctem.wiki.retrieval")
+    if retrieval is not None:
+        retrieval.invalidate_wiki_caches()
 
 
 if __name__ == "__main__":
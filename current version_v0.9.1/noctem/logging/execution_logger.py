@@ -6,7 +6,6 @@ input → classify → route → execute → complete
 
 Each trace is identified by a UUID and can span multiple stages.
 """
-import json
 import logging
 import uuid
 from contextlib import contextmanager
@@ -15,7 +14,7 @@ from time import perf_counter
 from typing import Optional, List, Any
 
 from ..db import get_db
-from ..models import ExecutionLog
+from ..models import ExecutionLog, json_column
 
 logger = logging.getLogger(__name__)
 
@@ -171,15 +170,15 @@ class ExecutionLogger:
                     self.trace_id,
                     stage,
                     self.component,
-                    json.dumps(input_data) if input_data else None,
-                    json.dumps(output_data) if output_data else None,
+                    json_column(input_data),
+                    json_column(output_data),
                     confidence,
                     duration_ms,
                     model_used,
                     self._thought_id,
                     self._task_id,
                     error,
-                    json.dumps(metadata) if metadata else None,
+                    json_column(metadata),
                 ))
                 return conn.execute("SELECT last_insert_rowid()").fetchone()[0]
         except Exception as e:
@@ -203,7 +202,7 @@ def get_trace(trace_id: str) -> List[ExecutionLog]:
             WHERE trace_id = ?
             ORDER BY timestamp ASC, id ASC
         """, (trace_id,)).fetchall()
-        return [ExecutionLog.from_row(row) for row in rows]
+        return ExecutionLog.from_rows(rows)
 
 
 def get_recent_traces(limit: int = 20, component: str = None) -> List[dict]:
@@ -2,12 +2,131 @@
 Data models for Noctem entities.
 """
 from dataclasses import dataclass, field
+from bisect import bisect_left
 from datetime import date, time, datetime
+from functools import lru_cache
 from typing import Optional
+import io
 import json
 
+# Optional: orjson encodes/decodes JSON columns several times faster in bulk
+try:
+    import orjson
+    _jloads = orjson.loads
+    ORJSON_AVAILABLE = True
+except ImportError:
+    _jloads = json.loads
+    ORJSON_AVAILABLE = False
 
-@dataclass
+# Optional: ijson streams very large JSON arrays item by item
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+
+if ORJSON_AVAILABLE:
+    _oj_dumps = orjson.dumps
+    _OJ_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def _jdumps(obj) -> str:
+        """Serialize a JSON column value to str (orjson when it can handle the value)."""
+        try:
+            return _oj_dumps(obj, option=_OJ_OPTIONS).decode()
+        except TypeError:
+            return json.dumps(obj)
+else:
+    _jdumps = json.dumps
+
+
+def json_column(value) -> Optional[str]:
+    """JSON text for a nullable column: None for empty/missing values.
+    
+    Persistence code can call this with the raw value instead of building
+    a model just to use its *_json() method.
+    """
+    return _jdumps(value) if value else None
+
+
+# Stored values that decode to an empty container; skipped without parsing
+_EMPTY_JSON = frozenset(("[]", "{}", b"[]", b"{}"))
+
+
+def _read_only(*args, **kwargs):
+    raise TypeError("shared empty container is read-only; assign a new value instead")
+
+
+class _EmptyDict(dict):
+    """Shared read-only {} for empty JSON columns (still a dict to callers)."""
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    update = setdefault = pop = popitem = clear = _read_only
+
+
+class _EmptyList(list):
+    """Shared read-only [] for empty JSON columns (still a list to callers)."""
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+
+
+# Rows with empty JSON columns share these instead of allocating new ones
+_EMPTY_DICT = _EmptyDict()
+_EMPTY_LIST = _EmptyList()
+
+
+def _loads_or_empty(raw, empty=_EMPTY_DICT):
+    """Decode a JSON column, returning the shared empty value for NULL, empty or bad JSON."""
+    if not raw or raw in _EMPTY_JSON:
+        return empty
+    try:
+        return _jloads(raw)
+    except (ValueError, TypeError):  # JSONDecodeError, or orjson given a non-str/bytes value
+        return empty
+
+
+_KEEP = object()
+
+# datetime.fromisoformat is implemented in C (~0.12us for SQLite's
+# "YYYY-MM-DD HH:MM:SS.ffffff"); a slicing/int() parser in Python is ~10x slower
+_fromisoformat = datetime.fromisoformat
+
+
+def _to_datetime(val, invalid=_KEEP):
+    """Parse an ISO datetime string from SQLite; other values pass through.
+    
+    Unparseable strings are returned unchanged unless `invalid` is given.
+    """
+    if val.__class__ is not str:
+        return val
+    try:
+        return _fromisoformat(val)
+    except ValueError:
+        return val if invalid is _KEEP else invalid
+
+
+def _to_date(val):
+    """Parse an ISO date string from SQLite; other values pass through."""
+    return date.fromisoformat(val) if val.__class__ is str else val
+
+
+def _to_time(val):
+    """Parse an ISO time string from SQLite; other values pass through."""
+    return time.fromisoformat(val) if val.__class__ is str else val
+
+
+@lru_cache(maxsize=64)
+def _colset(keys: tuple) -> frozenset:
+    return frozenset(keys)
+
+
+def _columns(row) -> frozenset:
+    """Column names of a row (shared frozenset per column layout), for optional columns."""
+    return _colset(tuple(row.keys()))
+
+
+@dataclass(slots=True)
 class Goal:
     id: Optional[int] = None
     name: str = ""
@@ -30,7 +149,7 @@ class Goal:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Project:
     id: Optional[int] = None
     name: str = ""
@@ -48,9 +167,10 @@ class Project:
     def from_row(cls, row) -> "Project":
         if row is None:
             return None
+        cols = _columns(row)
         # Safely get suggestion fields (may not exist in older DBs)
-        next_action = row["next_action_suggestion"] if "next_action_suggestion" in row.keys() else None
-        suggestion_at = row["suggestion_generated_at"] if "suggestion_generated_at" in row.keys() else None
+        next_action = row["next_action_suggestion"] if "next_action_suggestion" in cols else None
+        suggestion_at = row["suggestion_generated_at"] if "suggestion_generated_at" in cols else None
         return cls(
             id=row["id"],
             name=row["name"],
@@ -65,7 +185,14 @@ class Project:
         )
 
 
-@dataclass
+# Task urgency by days until due: <=0 days -> 1.0, 1 -> 0.9, <=3 -> 0.7,
+# <=7 -> 0.5, <=14 -> 0.3, <=30 -> 0.1, later -> 0.0
+_URGENCY_DAYS = (0, 1, 3, 7, 14, 30)
+_URGENCY_VALUES = (1.0, 0.9, 0.7, 0.5, 0.3, 0.1, 0.0)
+_NO_DUE_DAYS = 1 << 30
+
+
+@dataclass(slots=True)
 class Task:
     id: Optional[int] = None
     name: str = ""
@@ -92,28 +219,17 @@ class Task:
     @property
     def urgency(self) -> float:
         """Calculate urgency score (0-1) based on due date. Higher = more urgent."""
+        return self.urgency_at(date.today())
+
+    def urgency_at(self, today: date) -> float:
+        """Urgency relative to a given day (lets bulk callers share one date.today())."""
         if self.due_date is None:
             return 0.0  # No due date = not urgent
         
-        today = date.today()
         days_until = (self.due_date - today).days
-        
-        if days_until < 0:  # Overdue
+        if days_until <= 0:  # Overdue or due today
             return 1.0
-        elif days_until == 0:  # Due today
-            return 1.0
-        elif days_until == 1:  # Due tomorrow
-            return 0.9
-        elif days_until <= 3:  # Due within 3 days
-            return 0.7
-        elif days_until <= 7:  # Due within a week
-            return 0.5
-        elif days_until <= 14:  # Due within 2 weeks
-            return 0.3
-        elif days_until <= 30:  # Due within a month
-            return 0.1
-        else:
-            return 0.0
+        return _URGENCY_VALUES[bisect_left(_URGENCY_DAYS, days_until)]
 
     @property
     def priority_score(self) -> float:
@@ -125,22 +241,12 @@ class Task:
     def from_row(cls, row) -> "Task":
         if row is None:
             return None
-        tags = []
-        if row["tags"]:
-            try:
-                tags = json.loads(row["tags"])
-            except json.JSONDecodeError:
-                tags = []
-        
-        # Parse due_date if it's a string
-        due_date_val = row["due_date"]
-        if isinstance(due_date_val, str):
-            due_date_val = date.fromisoformat(due_date_val)
+        cols = _columns(row)
+        tags = _loads_or_empty(row["tags"], _EMPTY_LIST)
         
-        # Parse due_time if it's a string
-        due_time_val = row["due_time"]
-        if isinstance(due_time_val, str):
-            due_time_val = time.fromisoformat(due_time_val)
+        # DATE/TIME columns come back from SQLite as ISO strings
+        due_date_val = _to_date(row["due_date"])
+        due_time_val = _to_time(row["due_time"])
         
         # Get importance, default to 0.5 if not present or None
         importance_val = row.get("importance") if hasattr(row, 'get') else row["importance"]
@@ -148,9 +254,9 @@ class Task:
             importance_val = 0.5
         
         # Safely get suggestion fields (may not exist in older DBs)
-        computer_help = row["computer_help_suggestion"] if "computer_help_suggestion" in row.keys() else None
-        suggestion_at = row["suggestion_generated_at"] if "suggestion_generated_at" in row.keys() else None
-        duration = row["duration_minutes"] if "duration_minutes" in row.keys() else None
+        computer_help = row["computer_help_suggestion"] if "computer_help_suggestion" in cols else None
+        suggestion_at = row["suggestion_generated_at"] if "suggestion_generated_at" in cols else None
+        duration = row["duration_minutes"] if "duration_minutes" in cols else None
         
         return cls(
             id=row["id"],
@@ -171,10 +277,47 @@ class Task:
 
     def tags_json(self) -> str:
         """Return tags as JSON string for DB storage."""
-        return json.dumps(self.tags) if self.tags else None
-
-
-@dataclass
+        return json_column(self.tags)
+
+
+def score_tasks(tasks: list[Task], today: Optional[date] = None):
+    """
+    Priority scores for many tasks at once (same values as Task.priority_score).
+    
+    Args:
+        tasks: Tasks to score
+        today: Reference day for urgency (defaults to date.today())
+    
+    Returns:
+        numpy float32 array of scores, aligned with tasks
+    """
+    import numpy as np  # deferred: only bulk ranking needs numpy
+    
+    today_ord = (today or date.today()).toordinal()
+    n = len(tasks)
+    importance = np.fromiter((t.importance for t in tasks), dtype=np.float32, count=n)
+    # Tasks without a due date land past the last threshold (urgency 0.0)
+    days = np.fromiter(
+        (t.due_date.toordinal() - today_ord if t.due_date else _NO_DUE_DAYS for t in tasks),
+        dtype=np.int32, count=n,
+    )
+    
+    urgency = np.asarray(_URGENCY_VALUES, dtype=np.float32)
+    urgency = urgency[np.searchsorted(np.asarray(_URGENCY_DAYS, dtype=np.int32), days)]
+    return importance * np.float32(0.6) + urgency * np.float32(0.4)
+
+
+def rank_tasks(tasks: list[Task], today: Optional[date] = None) -> list[Task]:
+    """Tasks sorted by priority_score, highest first (ties keep input order)."""
+    if len(tasks) < 2:
+        return list(tasks)
+    import numpy as np
+    
+    order = np.argsort(-score_tasks(tasks, today), kind="stable")
+    return [tasks[i] for i in order]
+
+
+@dataclass(slots=True)
 class TimeBlock:
     id: Optional[int] = None
     title: str = ""
@@ -191,19 +334,9 @@ class TimeBlock:
             return None
         
         # Parse datetime strings from SQLite
-        start_time = row["start_time"]
-        if isinstance(start_time, str):
-            try:
-                start_time = datetime.fromisoformat(start_time)
-            except ValueError:
-                pass
+        start_time = _to_datetime(row["start_time"])
         
-        end_time = row["end_time"]
-        if isinstance(end_time, str):
-            try:
-                end_time = datetime.fromisoformat(end_time)
-            except ValueError:
-                pass
+        end_time = _to_datetime(row["end_time"])
         
         return cls(
             id=row["id"],
@@ -217,7 +350,7 @@ class TimeBlock:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class ActionLog:
     id: Optional[int] = None
     action_type: str = ""  # task_created, task_completed, etc.
@@ -230,12 +363,7 @@ class ActionLog:
     def from_row(cls, row) -> "ActionLog":
         if row is None:
             return None
-        details = {}
-        if row["details"]:
-            try:
-                details = json.loads(row["details"])
-            except json.JSONDecodeError:
-                details = {}
+        details = _loads_or_empty(row["details"])
         return cls(
             id=row["id"],
             action_type=row["action_type"],
@@ -247,10 +375,10 @@ class ActionLog:
 
     def details_json(self) -> str:
         """Return details as JSON string for DB storage."""
-        return json.dumps(self.details) if self.details else None
+        return json_column(self.details)
 
 
-@dataclass
+@dataclass(slots=True)
 class Thought:
     """Universal capture for all inputs (royal scribe pattern)."""
     id: Optional[int] = None
@@ -270,23 +398,24 @@ class Thought:
     def from_row(cls, row) -> "Thought":
         if row is None:
             return None
+        cols = _columns(row)
         return cls(
             id=row["id"],
             source=row["source"],
             raw_text=row["raw_text"],
             kind=row["kind"],
-            ambiguity_reason=row["ambiguity_reason"] if "ambiguity_reason" in row.keys() else None,
+            ambiguity_reason=row["ambiguity_reason"] if "ambiguity_reason" in cols else None,
             confidence=row["confidence"],
             linked_task_id=row["linked_task_id"],
             linked_project_id=row["linked_project_id"],
-            voice_journal_id=row["voice_journal_id"] if "voice_journal_id" in row.keys() else None,
+            voice_journal_id=row["voice_journal_id"] if "voice_journal_id" in cols else None,
             status=row["status"],
             created_at=row["created_at"],
             processed_at=row["processed_at"],
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Conversation:
     """Unified conversation log across web/CLI/Telegram."""
     id: Optional[int] = None
@@ -303,19 +432,9 @@ class Conversation:
     def from_row(cls, row) -> "Conversation":
         if row is None:
             return None
-        metadata = {}
-        if row["metadata"]:
-            try:
-                metadata = json.loads(row["metadata"])
-            except json.JSONDecodeError:
-                metadata = {}
+        metadata = _loads_or_empty(row["metadata"])
         # Parse created_at if it's a string
-        created_at_val = row["created_at"]
-        if isinstance(created_at_val, str):
-            try:
-                created_at_val = datetime.fromisoformat(created_at_val)
-            except ValueError:
-                pass
+        created_at_val = _to_datetime(row["created_at"])
         
         return cls(
             id=row["id"],
@@ -331,10 +450,10 @@ class Conversation:
 
     def metadata_json(self) -> str:
         """Return metadata as JSON string for DB storage."""
-        return json.dumps(self.metadata) if self.metadata else None
+        return json_column(self.metadata)
 
 
-@dataclass
+@dataclass(slots=True)
 class PromptTemplate:
     """LLM prompt template with versioning."""
     id: Optional[int] = None
@@ -356,7 +475,7 @@ class PromptTemplate:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class PromptVersion:
     """A specific version of a prompt template."""
     id: Optional[int] = None
@@ -371,19 +490,9 @@ class PromptVersion:
     def from_row(cls, row) -> "PromptVersion":
         if row is None:
             return None
-        variables = []
-        if row["variables"]:
-            try:
-                variables = json.loads(row["variables"])
-            except json.JSONDecodeError:
-                variables = []
+        variables = _loads_or_empty(row["variables"], _EMPTY_LIST)
         # Parse created_at if it's a string
-        created_at_val = row["created_at"]
-        if isinstance(created_at_val, str):
-            try:
-                created_at_val = datetime.fromisoformat(created_at_val)
-            except ValueError:
-                pass
+        created_at_val = _to_datetime(row["created_at"])
         return cls(
             id=row["id"],
             template_id=row["template_id"],
@@ -396,10 +505,10 @@ class PromptVersion:
 
     def variables_json(self) -> str:
         """Return variables as JSON string for DB storage."""
-        return json.dumps(self.variables) if self.variables else None
+        return json_column(self.variables)
 
 
-@dataclass
+@dataclass(slots=True)
 class ExecutionLog:
     """Execution trace log entry for pipeline debugging and analysis."""
     id: Optional[int] = None
@@ -419,29 +528,16 @@ class ExecutionLog:
     metadata: dict = field(default_factory=dict)
 
     @classmethod
-    def from_row(cls, row) -> "ExecutionLog":
+    def from_row(cls, row, cols: Optional[frozenset] = None) -> "ExecutionLog":
         if row is None:
             return None
-        input_data = {}
-        if row["input_data"]:
-            try:
-                input_data = json.loads(row["input_data"])
-            except json.JSONDecodeError:
-                input_data = {}
-        output_data = {}
-        if row["output_data"]:
-            try:
-                output_data = json.loads(row["output_data"])
-            except json.JSONDecodeError:
-                output_data = {}
-        metadata = {}
-        if row["metadata"]:
-            try:
-                metadata = json.loads(row["metadata"])
-            except json.JSONDecodeError:
-                metadata = {}
+        if cols is None:
+            cols = _columns(row)
+        input_data = _loads_or_empty(row["input_data"])
+        output_data = _loads_or_empty(row["output_data"])
+        metadata = _loads_or_empty(row["metadata"])
         # Get project_id safely (may not exist in older databases)
-        project_id_val = row["project_id"] if "project_id" in row.keys() else None
+        project_id_val = row["project_id"] if "project_id" in cols else None
         
         return cls(
             id=row["id"],
@@ -461,8 +557,17 @@ class ExecutionLog:
             metadata=metadata,
         )
 
+    @classmethod
+    def from_rows(cls, rows) -> list["ExecutionLog"]:
+        """Convert a whole result set, detecting optional columns once."""
+        if not rows:
+            return []
+        cols = _columns(rows[0])
+        from_row = cls.from_row
+        return [from_row(row, cols) for row in rows]
+
 
-@dataclass
+@dataclass(slots=True)
 class ModelInfo:
     """Information about a local LLM model."""
     name: str = ""
@@ -504,7 +609,7 @@ class ModelInfo:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class MaintenanceInsight:
     """System maintenance insight for self-improvement."""
     id: Optional[int] = None
@@ -522,12 +627,7 @@ class MaintenanceInsight:
     def from_row(cls, row) -> "MaintenanceInsight":
         if row is None:
             return None
-        details = {}
-        if row["details"]:
-            try:
-                details = json.loads(row["details"])
-            except json.JSONDecodeError:
-                details = {}
+        details = _loads_or_empty(row["details"])
         return cls(
             id=row["id"],
             insight_type=row["insight_type"],
@@ -543,10 +643,10 @@ class MaintenanceInsight:
 
     def details_json(self) -> str:
         """Return details as JSON string for DB storage."""
-        return json.dumps(self.details) if self.details else None
+        return json_column(self.details)
 
 
-@dataclass
+@dataclass(slots=True)
 class DetectedPattern:
     """Detected pattern for self-improvement engine."""
     id: Optional[int] = None
@@ -563,25 +663,10 @@ class DetectedPattern:
     def from_row(cls, row) -> "DetectedPattern":
         if row is None:
             return None
-        context = {}
-        if row["context"]:
-            try:
-                context = json.loads(row["context"])
-            except json.JSONDecodeError:
-                context = {}
+        context = _loads_or_empty(row["context"])
         # Parse datetime strings
-        first_seen_val = row["first_seen"]
-        if isinstance(first_seen_val, str):
-            try:
-                first_seen_val = datetime.fromisoformat(first_seen_val)
-            except ValueError:
-                pass
-        last_seen_val = row["last_seen"]
-        if isinstance(last_seen_val, str):
-            try:
-                last_seen_val = datetime.fromisoformat(last_seen_val)
-            except ValueError:
-                pass
+        first_seen_val = _to_datetime(row["first_seen"])
+        last_seen_val = _to_datetime(row["last_seen"])
         return cls(
             id=row["id"],
             pattern_type=row["pattern_type"],
@@ -596,10 +681,10 @@ class DetectedPattern:
 
     def context_json(self) -> str:
         """Return context as JSON string for DB storage."""
-        return json.dumps(self.context) if self.context else None
+        return json_column(self.context)
 
 
-@dataclass
+@dataclass(slots=True)
 class LearnedRule:
     """Learned rule for classifier improvements."""
     id: Optional[int] = None
@@ -617,25 +702,11 @@ class LearnedRule:
     def from_row(cls, row) -> "LearnedRule":
         if row is None:
             return None
-        rule_value = {}
-        if row["rule_value"]:
-            try:
-                rule_value = json.loads(row["rule_value"])
-            except json.JSONDecodeError:
-                rule_value = {}
+        cols = _columns(row)
+        rule_value = _loads_or_empty(row["rule_value"])
         # Parse datetime strings
-        created_at_val = row["created_at"]
-        if isinstance(created_at_val, str):
-            try:
-                created_at_val = datetime.fromisoformat(created_at_val)
-            except ValueError:
-                pass
-        last_applied_val = row["last_applied"] if "last_applied" in row.keys() else None
-        if last_applied_val and isinstance(last_applied_val, str):
-            try:
-                last_applied_val = datetime.fromisoformat(last_applied_val)
-            except ValueError:
-                pass
+        created_at_val = _to_datetime(row["created_at"])
+        last_applied_val = _to_datetime(row["last_applied"] if "last_applied" in cols else None)
         return cls(
             id=row["id"],
             rule_type=row["rule_type"],
@@ -651,10 +722,10 @@ class LearnedRule:
 
     def rule_value_json(self) -> str:
         """Return rule_value as JSON string for DB storage."""
-        return json.dumps(self.rule_value) if self.rule_value else None
+        return json_column(self.rule_value)
 
 
-@dataclass
+@dataclass(slots=True)
 class FeedbackEvent:
     """User feedback on suggestions/insights."""
     id: Optional[int] = None
@@ -669,19 +740,9 @@ class FeedbackEvent:
     def from_row(cls, row) -> "FeedbackEvent":
         if row is None:
             return None
-        context = {}
-        if row["context"]:
-            try:
-                context = json.loads(row["context"])
-            except json.JSONDecodeError:
-                context = {}
+        context = _loads_or_empty(row["context"])
         # Parse datetime strings
-        created_at_val = row["created_at"]
-        if isinstance(created_at_val, str):
-            try:
-                created_at_val = datetime.fromisoformat(created_at_val)
-            except ValueError:
-                pass
+        created_at_val = _to_datetime(row["created_at"])
         return cls(
             id=row["id"],
             entity_type=row["entity_type"],
@@ -694,10 +755,10 @@ class FeedbackEvent:
 
     def context_json(self) -> str:
         """Return context as JSON string for DB storage."""
-        return json.dumps(self.context) if self.context else None
+        return json_column(self.context)
 
 
-@dataclass
+@dataclass(slots=True)
 class Experiment:
     """A/B testing experiment."""
     id: Optional[int] = None
@@ -713,31 +774,11 @@ class Experiment:
     def from_row(cls, row) -> "Experiment":
         if row is None:
             return None
-        variant_a = {}
-        if row["variant_a"]:
-            try:
-                variant_a = json.loads(row["variant_a"])
-            except json.JSONDecodeError:
-                variant_a = {}
-        variant_b = {}
-        if row["variant_b"]:
-            try:
-                variant_b = json.loads(row["variant_b"])
-            except json.JSONDecodeError:
-                variant_b = {}
+        variant_a = _loads_or_empty(row["variant_a"])
+        variant_b = _loads_or_empty(row["variant_b"])
         # Parse datetime strings
-        started_at_val = row["started_at"]
-        if isinstance(started_at_val, str):
-            try:
-                started_at_val = datetime.fromisoformat(started_at_val)
-            except ValueError:
-                pass
-        ended_at_val = row.get("ended_at")
-        if isinstance(ended_at_val, str):
-            try:
-                ended_at_val = datetime.fromisoformat(ended_at_val)
-            except ValueError:
-                pass
+        started_at_val = _to_datetime(row["started_at"])
+        ended_at_val = _to_datetime(row.get("ended_at"))
         return cls(
             id=row["id"],
             experiment_type=row["experiment_type"],
@@ -751,14 +792,14 @@ class Experiment:
 
     def variant_a_json(self) -> str:
         """Return variant_a as JSON string for DB storage."""
-        return json.dumps(self.variant_a) if self.variant_a else None
+        return json_column(self.variant_a)
 
     def variant_b_json(self) -> str:
         """Return variant_b as JSON string for DB storage."""
-        return json.dumps(self.variant_b) if self.variant_b else None
+        return json_column(self.variant_b)
 
 
-@dataclass
+@dataclass(slots=True)
 class ExperimentResult:
     """Result from an A/B testing experiment."""
     id: Optional[int] = None
@@ -772,19 +813,9 @@ class ExperimentResult:
     def from_row(cls, row) -> "ExperimentResult":
         if row is None:
             return None
-        outcome_metric = {}
-        if row["outcome_metric"]:
-            try:
-                outcome_metric = json.loads(row["outcome_metric"])
-            except json.JSONDecodeError:
-                outcome_metric = {}
+        outcome_metric = _loads_or_empty(row["outcome_metric"])
         # Parse datetime strings
-        created_at_val = row["created_at"]
-        if isinstance(created_at_val, str):
-            try:
-                created_at_val = datetime.fromisoformat(created_at_val)
-            except ValueError:
-                pass
+        created_at_val = _to_datetime(row["created_at"])
         return cls(
             id=row["id"],
             experiment_id=row["experiment_id"],
@@ -796,25 +827,42 @@ class ExperimentResult:
 
     def outcome_metric_json(self) -> str:
         """Return outcome_metric as JSON string for DB storage."""
-        return json.dumps(self.outcome_metric) if self.outcome_metric else None
+        return json_column(self.outcome_metric)
 
 
 # =============================================================================
 # v0.8.0: Skills Infrastructure
 # =============================================================================
 
-@dataclass
+# Interned SkillTrigger instances by (pattern, confidence_threshold)
+_TRIGGER_CACHE: dict = {}
+_TRIGGER_CACHE_SIZE = 4096
+
+
+@dataclass(slots=True, frozen=True)
 class SkillTrigger:
-    """A trigger pattern for a skill."""
+    """A trigger pattern for a skill (immutable, so instances are shared)."""
     pattern: str = ""
     confidence_threshold: float = 0.8  # 0.0-1.0
+    # Lowercased pattern used for matching, computed once at construction
+    match_key: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        key = self.pattern.lower() if isinstance(self.pattern, str) else ""
+        object.__setattr__(self, "match_key", key)
 
     @classmethod
     def from_dict(cls, data: dict) -> "SkillTrigger":
-        return cls(
-            pattern=data.get("pattern", ""),
-            confidence_threshold=data.get("confidence_threshold", 0.8),
-        )
+        key = (data.get("pattern", ""), data.get("confidence_threshold", 0.8))
+        try:
+            trigger = _TRIGGER_CACHE.get(key)
+        except TypeError:  # unhashable values from a malformed SKILL.yaml
+            return cls(*key)
+        if trigger is None:
+            if len(_TRIGGER_CACHE) >= _TRIGGER_CACHE_SIZE:
+                _TRIGGER_CACHE.pop(next(iter(_TRIGGER_CACHE)), None)
+            trigger = _TRIGGER_CACHE[key] = cls(*key)
+        return trigger
 
     def to_dict(self) -> dict:
         return {
@@ -823,7 +871,36 @@ class SkillTrigger:
         }
 
 
-@dataclass
+@lru_cache(maxsize=1024)
+def _decode_triggers(raw) -> tuple:
+    """Decode a skills.triggers column once per distinct JSON text."""
+    return tuple(SkillTrigger.from_dict(t) for t in _loads_or_empty(raw, _EMPTY_LIST))
+
+
+# Trigger columns above this size bypass the decode cache (bytes/chars)
+_LARGE_TRIGGERS = 64 * 1024
+
+
+def _stream_triggers(raw) -> list:
+    """Build triggers from a large skills.triggers column.
+    
+    With ijson the array is read one item at a time, so the decoded list
+    of dicts never exists alongside the SkillTrigger list. Large blobs are
+    never cached either way.
+    """
+    if not IJSON_AVAILABLE:
+        return [SkillTrigger.from_dict(t) for t in _loads_or_empty(raw, _EMPTY_LIST)]
+    data = io.BytesIO(raw.encode() if isinstance(raw, str) else raw)
+    try:
+        return [
+            SkillTrigger.from_dict(t)
+            for t in ijson.items(data, "item", use_float=True)
+        ]
+    except (ijson.JSONError, ValueError):
+        return []
+
+
+@dataclass(slots=True)
 class SkillMetadata:
     """Parsed SKILL.yaml content (not stored in DB, used for loading)."""
     name: str = ""
@@ -845,7 +922,8 @@ class SkillMetadata:
             version=data.get("version", "1.0.0"),
             description=data.get("description", ""),
             triggers=triggers,
-            dependencies=data.get("dependencies", []),
+            # Copied: data may be a shared, cached parse of SKILL.yaml
+            dependencies=list(data.get("dependencies", [])),
             requires_approval=data.get("requires_approval", False),
             instructions_file=data.get("instructions_file", "instructions.md"),
         )
@@ -862,7 +940,7 @@ class SkillMetadata:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Skill:
     """Skill registry entry (stored in DB)."""
     id: Optional[int] = None
@@ -890,72 +968,62 @@ class Skill:
         return (self.success_count / self.use_count) * 100
 
     @classmethod
-    def from_row(cls, row) -> "Skill":
+    def from_row(cls, row, cols: Optional[frozenset] = None) -> "Skill":
         if row is None:
             return None
+        if cols is None:
+            cols = _columns(row)
         # Parse triggers JSON
-        triggers = []
-        if row["triggers"]:
-            try:
-                triggers_data = json.loads(row["triggers"])
-                triggers = [SkillTrigger.from_dict(t) for t in triggers_data]
-            except json.JSONDecodeError:
-                triggers = []
+        raw_triggers = row["triggers"]
+        if raw_triggers and len(raw_triggers) > _LARGE_TRIGGERS:
+            triggers = _stream_triggers(raw_triggers)
+        else:
+            triggers = list(_decode_triggers(raw_triggers))
         # Parse dependencies JSON
-        dependencies = []
-        if row["dependencies"]:
-            try:
-                dependencies = json.loads(row["dependencies"])
-            except json.JSONDecodeError:
-                dependencies = []
+        dependencies = _loads_or_empty(row["dependencies"], _EMPTY_LIST)
         # Parse datetime strings
-        last_used_val = row["last_used"]
-        if isinstance(last_used_val, str):
-            try:
-                last_used_val = datetime.fromisoformat(last_used_val)
-            except ValueError:
-                last_used_val = None
-        created_at_val = row["created_at"]
-        if isinstance(created_at_val, str):
-            try:
-                created_at_val = datetime.fromisoformat(created_at_val)
-            except ValueError:
-                pass
-        updated_at_val = row["updated_at"] if "updated_at" in row.keys() else None
-        if isinstance(updated_at_val, str):
-            try:
-                updated_at_val = datetime.fromisoformat(updated_at_val)
-            except ValueError:
-                updated_at_val = None
+        last_used_val = _to_datetime(row["last_used"], None)
+        created_at_val = _to_datetime(row["created_at"])
+        updated_at_val = _to_datetime(row["updated_at"] if "updated_at" in cols else None, None)
+        # Positional, in field order: keyword dispatch costs ~3x on this path
         return cls(
-            id=row["id"],
-            name=row["name"],
-            version=row["version"],
-            source=row["source"],
-            skill_path=row["skill_path"],
-            description=row["description"],
-            triggers=triggers,
-            dependencies=dependencies,
-            requires_approval=bool(row["requires_approval"]),
-            enabled=bool(row["enabled"]),
-            last_used=last_used_val,
-            use_count=row["use_count"],
-            success_count=row["success_count"],
-            failure_count=row["failure_count"],
-            created_at=created_at_val,
-            updated_at=updated_at_val,
+            row["id"],
+            row["name"],
+            row["version"],
+            row["source"],
+            row["skill_path"],
+            row["description"],
+            triggers,
+            dependencies,
+            bool(row["requires_approval"]),
+            bool(row["enabled"]),
+            last_used_val,
+            row["use_count"],
+            row["success_count"],
+            row["failure_count"],
+            created_at_val,
+            updated_at_val,
         )
 
+    @classmethod
+    def from_rows(cls, rows) -> list["Skill"]:
+        """Convert a whole result set, detecting optional columns once."""
+        if not rows:
+            return []
+        cols = _columns(rows[0])
+        from_row = cls.from_row
+        return [from_row(row, cols) for row in rows]
+
     def triggers_json(self) -> str:
         """Return triggers as JSON string for DB storage."""
-        return json.dumps([t.to_dict() for t in self.triggers]) if self.triggers else "[]"
+        return _jdumps([t.to_dict() for t in self.triggers]) if self.triggers else "[]"
 
     def dependencies_json(self) -> str:
         """Return dependencies as JSON string for DB storage."""
-        return json.dumps(self.dependencies) if self.dependencies else "[]"
+        return _jdumps(self.dependencies) if self.dependencies else "[]"
 
 
-@dataclass
+@dataclass(slots=True)
 class SkillExecution:
     """Skill execution record."""
     id: Optional[int] = None
@@ -994,47 +1062,52 @@ class SkillExecution:
         return None
 
     @classmethod
-    def from_row(cls, row, skill_name: str = None) -> "SkillExecution":
+    def from_row(cls, row, skill_name: str = None,
+                 cols: Optional[frozenset] = None) -> "SkillExecution":
         if row is None:
             return None
-        # Parse datetime strings
-        def parse_dt(val):
-            if isinstance(val, str):
-                try:
-                    return datetime.fromisoformat(val)
-                except ValueError:
-                    return None
-            return val
+        if cols is None:
+            cols = _columns(row)
         # Get skill_name from row if present (from JOIN) or use parameter
         name = skill_name
-        if "skill_name" in row.keys():
+        if "skill_name" in cols:
             name = row["skill_name"]
+        # Positional, in field order (see Skill.from_row)
         return cls(
-            id=row["id"],
-            skill_id=row["skill_id"],
-            skill_name=name,
-            trace_id=row["trace_id"],
-            trigger_type=row["trigger_type"],
-            trigger_input=row["trigger_input"],
-            trigger_confidence=row["trigger_confidence"],
-            skill_version=row["skill_version"],
-            status=row["status"],
-            approval_required=bool(row["approval_required"]),
-            approved_by=row["approved_by"],
-            approved_at=parse_dt(row["approved_at"]),
-            output_summary=row["output_summary"],
-            error_message=row["error_message"],
-            started_at=parse_dt(row["started_at"]),
-            completed_at=parse_dt(row["completed_at"]),
-            created_at=parse_dt(row["created_at"]),
+            row["id"],
+            row["skill_id"],
+            name,
+            row["trace_id"],
+            row["trigger_type"],
+            row["trigger_input"],
+            row["trigger_confidence"],
+            row["skill_version"],
+            row["status"],
+            bool(row["approval_required"]),
+            row["approved_by"],
+            _to_datetime(row["approved_at"], None),
+            row["output_summary"],
+            row["error_message"],
+            _to_datetime(row["started_at"], None),
+            _to_datetime(row["completed_at"], None),
+            _to_datetime(row["created_at"], None),
         )
 
+    @classmethod
+    def from_rows(cls, rows) -> list["SkillExecution"]:
+        """Convert a whole result set, detecting optional columns once."""
+        if not rows:
+            return []
+        cols = _columns(rows[0])
+        from_row = cls.from_row
+        return [from_row(row, cols=cols) for row in rows]
+
 
 # =============================================================================
 # v0.9.0: Wiki Models
 # =============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class Source:
     """A document source for the wiki knowledge base."""
     id: Optional[int] = None
@@ -1045,6 +1118,7 @@ class Source:
     author: Optional[str] = None
     file_hash: Optional[str] = None  # SHA-256
     file_size_bytes: Optional[int] = None
+    file_mtime_ns: Optional[int] = None  # None = unknown, always re-hash
     trust_level: int = 1  # 1=personal, 2=curated, 3=web
     status: str = "pending"  # 'pending', 'processing', 'indexed', 'failed', 'changed'
     chunk_count: int = 0
@@ -1074,14 +1148,9 @@ class Source:
         if row is None:
             return None
         
-        def parse_dt(val):
-            if isinstance(val, str):
-                try:
-                    return datetime.fromisoformat(val)
-                except ValueError:
-                    return None
-            return val
-        
+        trust_level = row["trust_level"]
+        status = row["status"]
+        chunk_count = row["chunk_count"]
         return cls(
             id=row["id"],
             file_path=row["file_path"],
@@ -1091,17 +1160,23 @@ class Source:
             author=row["author"],
             file_hash=row["file_hash"],
             file_size_bytes=row["file_size_bytes"],
-            trust_level=row["trust_level"] or 1,
-            status=row["status"] or "pending",
-            chunk_count=row["chunk_count"] or 0,
-            ingested_at=parse_dt(row["ingested_at"]),
-            last_verified=parse_dt(row["last_verified"]),
+            file_mtime_ns=row["file_mtime_ns"],
+            trust_level=trust_level if trust_level is not None else 1,
+            status=status if status is not None else "pending",
+            chunk_count=chunk_count if chunk_count is not None else 0,
+            ingested_at=_to_datetime(row["ingested_at"], None),
+            last_verified=_to_datetime(row["last_verified"], None),
             error_message=row["error_message"],
-            created_at=parse_dt(row["created_at"]),
+            created_at=_to_datetime(row["created_at"], None),
         )
 
+    @classmethod
+    def from_rows(cls, rows) -> list["Source"]:
+        """Convert a whole result set."""
+        return list(map(cls.from_row, rows))
+
 
-@dataclass
+@dataclass(slots=True)
 class KnowledgeChunk:
     """A chunk of text from a source document, with embedding reference."""
     id: Optional[int] = None
@@ -1113,6 +1188,7 @@ class KnowledgeChunk:
     token_count: Optional[int] = None
     start_char: Optional[int] = None
     end_char: Optional[int] = None
+    content_simhash: Optional[int] = None  # None for chunks ingested before it existed
     created_at: Optional[datetime] = None
     # Transient fields (not stored in DB, populated at runtime)
     source: Optional[Source] = None  # Parent source (for citations)
@@ -1134,34 +1210,33 @@ class KnowledgeChunk:
         if row is None:
             return None
         
-        def parse_dt(val):
-            if isinstance(val, str):
-                try:
-                    return datetime.fromisoformat(val)
-                except ValueError:
-                    return None
-            return val
-        
+        chunk_index = row["chunk_index"]
         return cls(
             id=row["id"],
             source_id=row["source_id"],
             chunk_id=row["chunk_id"],
             content=row["content"],
             page_or_section=row["page_or_section"],
-            chunk_index=row["chunk_index"] or 0,
+            chunk_index=chunk_index if chunk_index is not None else 0,
             token_count=row["token_count"],
             start_char=row["start_char"],
             end_char=row["end_char"],
-            created_at=parse_dt(row["created_at"]),
+            content_simhash=row["content_simhash"],
+            created_at=_to_datetime(row["created_at"], None),
             source=source,
         )
 
+    @classmethod
+    def from_rows(cls, rows) -> list["KnowledgeChunk"]:
+        """Convert a whole result set."""
+        return list(map(cls.from_row, rows))
+
 
 # =============================================================================
 # v0.9.1: Feedback Session Models
 # =============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class FeedbackSession:
     """A feedback session for disambiguating tasks and projects."""
     id: Optional[int] = None
@@ -1179,28 +1254,20 @@ class FeedbackSession:
         if row is None:
             return None
         
-        def parse_dt(val):
-            if isinstance(val, str):
-                try:
-                    return datetime.fromisoformat(val)
-                except ValueError:
-                    return None
-            return val
-        
         return cls(
             id=row["id"],
             session_type=row["session_type"] or "scheduled",
             status=row["status"] or "pending",
-            scheduled_for=parse_dt(row["scheduled_for"]),
-            started_at=parse_dt(row["started_at"]),
-            completed_at=parse_dt(row["completed_at"]),
+            scheduled_for=_to_datetime(row["scheduled_for"], None),
+            started_at=_to_datetime(row["started_at"], None),
+            completed_at=_to_datetime(row["completed_at"], None),
             questions_asked=row["questions_asked"] or 0,
             questions_answered=row["questions_answered"] or 0,
-            created_at=parse_dt(row["created_at"]),
+            created_at=_to_datetime(row["created_at"], None),
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class FeedbackQuestion:
     """A question within a feedback session."""
     id: Optional[int] = None
@@ -1217,14 +1284,6 @@ class FeedbackQuestion:
         if row is None:
             return None
         
-        def parse_dt(val):
-            if isinstance(val, str):
-                try:
-                    return datetime.fromisoformat(val)
-                except ValueError:
-                    return None
-            return val
-        
         return cls(
             id=row["id"],
             session_id=row["session_id"],
@@ -1233,5 +1292,5 @@ class FeedbackQuestion:
             question_text=row["question_text"],
             answer_text=row["answer_text"],
             status=row["status"] or "pending",
-            created_at=parse_dt(row["created_at"]),
+            created_at=_to_datetime(row["created_at"], None),
         )
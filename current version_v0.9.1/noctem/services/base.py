@@ -1,9 +1,9 @@
 """
 Base service utilities including action logging.
 """
-import json
 from typing import Any, Optional
 from ..db import get_db
+from ..models import json_column
 
 
 def log_action(
@@ -26,7 +26,7 @@ def log_action(
                 action_type,
                 entity_type,
                 entity_id,
-                json.dumps(details) if details else None,
+                json_column(details),
             ),
         )
         return cursor.lastrowid
@@ -7,14 +7,13 @@ Provides unified conversation experience across web/CLI/Telegram:
 - Get thinking feed for verbose display
 - Export thinking log as JSON
 """
-import json
 import logging
 from datetime import datetime, timedelta
 from typing import Optional, Generator
 from uuid import uuid4
 
 from ..db import get_db
-from ..models import Conversation
+from ..models import Conversation, json_column
 
 logger = logging.getLogger(__name__)
 
@@ -62,7 +61,7 @@ def record_message(
                 content,
                 thinking_summary,
                 thinking_level,
-                json.dumps(metadata) if metadata else None,
+                json_column(metadata),
             )
         )
         msg_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
@@ -12,12 +12,12 @@ from datetime import datetime, date, time, timedelta
 from typing import List, Optional, Tuple
 
 from ..db import get_db
-from ..models import Task, TimeBlock
+from ..models import Task, TimeBlock, rank_tasks
 from . import task_service
 from .briefing import get_time_blocks_for_date
 
 
-@dataclass
+@dataclass(slots=True)
 class TimeGap:
     """A gap of free time in the calendar."""
     start: datetime
@@ -32,7 +32,7 @@ class TimeGap:
         return f"{start_str}-{end_str} ({self.duration_minutes} min)"
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskSuggestion:
     """A suggested task with context about why it fits."""
     task: Task
@@ -167,9 +167,7 @@ def get_tasks_for_gap(gap: TimeGap, max_count: int = 5) -> List[Task]:
             fitting_tasks.append(task)
     
     # Sort by priority score (highest first)
-    fitting_tasks.sort(key=lambda t: t.priority_score, reverse=True)
-    
-    return fitting_tasks[:max_count]
+    return rank_tasks(fitting_tasks)[:max_count]
 
 
 def get_fitting_tasks(gap: TimeGap) -> List[Task]:
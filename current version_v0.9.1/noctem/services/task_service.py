@@ -5,7 +5,7 @@ from typing import Optional
 from datetime import date, time, datetime, timedelta
 import json
 from ..db import get_db
-from ..models import Task
+from ..models import Task, json_column, rank_tasks
 from .base import log_action
 
 
@@ -35,7 +35,7 @@ def create_task(
                 due_date,
                 due_time,
                 importance,
-                json.dumps(tags) if tags else None,
+                json_column(tags),
                 recurrence_rule,
             ),
         )
@@ -142,9 +142,8 @@ def get_priority_tasks(max_count: int = 5) -> list[Task]:
         ).fetchall()
         tasks = [Task.from_row(row) for row in rows]
     
-    # Sort by priority_score (calculated property) descending
-    tasks.sort(key=lambda t: t.priority_score, reverse=True)
-    return tasks[:max_count]
+    # Sort by priority_score descending (scored in one vectorized pass)
+    return rank_tasks(tasks)[:max_count]
 
 
 def get_inbox_tasks() -> list[Task]:
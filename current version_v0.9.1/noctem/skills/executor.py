@@ -278,7 +278,7 @@ class SkillExecutor:
                 WHERE e.status = 'pending'
                 ORDER BY e.created_at
             """).fetchall()
-            return [SkillExecution.from_row(row) for row in rows]
+            return SkillExecution.from_rows(rows)
     
     # === Private methods ===
     
@@ -8,12 +8,26 @@ Handles:
 - Accessing skill resources
 """
 
-import re
+import os
+import stat
+import threading
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Iterator, Optional, Tuple
 
 import yaml
 
+# Use the libyaml-backed loader when PyYAML was built with it (much faster)
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# Optional: google-re2 matches the validation patterns as a DFA (no backtracking)
+try:
+    import re2 as _re
+except ImportError:
+    import re as _re
+
 from noctem.models import SkillMetadata, SkillTrigger
 
 
@@ -22,6 +36,38 @@ class SkillValidationError(Exception):
     pass
 
 
+# Parsed SKILL.yaml contents keyed by path, with the (mtime_ns, size, inode)
+# signature they were read at; edits and atomic rewrites change the signature
+_YAML_CACHE: dict[Path, tuple[tuple[int, int, int], Optional[dict]]] = {}
+_yaml_cache_lock = threading.Lock()
+
+
+def _read_yaml_cached(yaml_path: Path) -> Optional[dict]:
+    """
+    Parse a YAML file, reusing the previous result while the file is unchanged.
+    
+    The returned dict is shared between callers and must be treated as read-only.
+    
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        yaml.YAMLError: If YAML is malformed
+    """
+    st = os.stat(yaml_path)
+    sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+    
+    with _yaml_cache_lock:
+        cached = _YAML_CACHE.get(yaml_path)
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    
+    with open(yaml_path, 'rb') as f:
+        data = yaml.load(f, Loader=_YamlLoader)
+    
+    with _yaml_cache_lock:
+        _YAML_CACHE[yaml_path] = (sig, data)
+    return data
+
+
 class SkillLoader:
     """
     Loads and validates skill definitions from SKILL.yaml files.
@@ -33,8 +79,13 @@ class SkillLoader:
         instructions = loader.load_instructions(metadata, Path("/path/to/skill"))
     """
     
-    # Semver regex pattern
-    SEMVER_PATTERN = re.compile(r'^\d+\.\d+\.\d+$')
+    # Semver regex pattern. Both patterns are used with fullmatch and ASCII
+    # classes so re and re2 agree (re's $ also matches before a trailing
+    # newline, and its \d matches any Unicode digit)
+    SEMVER_PATTERN = _re.compile(r'[0-9]+\.[0-9]+\.[0-9]+')
+    
+    # Skill name: lowercase alphanumerics and hyphens, alphanumeric at both ends
+    NAME_PATTERN = _re.compile(r'(?:[a-z0-9]|[a-z0-9][a-z0-9\-]*[a-z0-9])')
     
     # Required fields in SKILL.yaml
     REQUIRED_FIELDS = ['name', 'version', 'description', 'triggers', 'requires_approval', 'instructions_file']
@@ -59,11 +110,10 @@ class SkillLoader:
         """
         yaml_path = skill_path / "SKILL.yaml"
         
-        if not yaml_path.exists():
-            raise FileNotFoundError(f"SKILL.yaml not found in {skill_path}")
-        
-        with open(yaml_path, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+        try:
+            data = _read_yaml_cached(yaml_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"SKILL.yaml not found in {skill_path}") from None
         
         if data is None:
             raise SkillValidationError("SKILL.yaml is empty")
@@ -80,99 +130,145 @@ class SkillLoader:
         Returns:
             Tuple of (is_valid, list_of_errors)
         """
-        errors = []
+        errors = list(self._iter_errors(skill_path))
+        return len(errors) == 0, errors
+    
+    def is_valid_skill(self, skill_path: Path) -> bool:
+        """
+        Check whether a skill is valid, stopping at the first error.
+        
+        Args:
+            skill_path: Path to the skill directory
+            
+        Returns:
+            True if validate_skill would report no errors
+        """
+        return next(self._iter_errors(skill_path), None) is None
+    
+    def parse_and_validate(self, skill_path: Path) -> Tuple[Optional[SkillMetadata], list[str]]:
+        """
+        Validate a skill and build its metadata from a single SKILL.yaml parse.
+        
+        Args:
+            skill_path: Path to the skill directory
+            
+        Returns:
+            Tuple of (metadata, errors); metadata is None when errors is non-empty
+        """
+        data, error = self._read_skill_data(skill_path)
+        if error is not None:
+            return None, [error]
         
-        # Check directory exists
-        if not skill_path.exists():
-            errors.append(f"Skill directory does not exist: {skill_path}")
-            return False, errors
+        errors = list(self._iter_data_errors(skill_path, data))
+        if errors:
+            return None, errors
         
-        if not skill_path.is_dir():
-            errors.append(f"Skill path is not a directory: {skill_path}")
-            return False, errors
+        return SkillMetadata.from_dict(data), errors
+    
+    def _iter_errors(self, skill_path: Path) -> Iterator[str]:
+        """Yield validation errors lazily (messages are only built when reached)."""
+        data, error = self._read_skill_data(skill_path)
+        if error is not None:
+            yield error
+            return
         
-        # Check SKILL.yaml exists
-        yaml_path = skill_path / "SKILL.yaml"
-        if not yaml_path.exists():
-            errors.append("SKILL.yaml not found")
-            return False, errors
+        yield from self._iter_data_errors(skill_path, data)
+    
+    def _read_skill_data(self, skill_path: Path) -> Tuple[Optional[dict], Optional[str]]:
+        """Read SKILL.yaml from a skill directory, returning (data, error)."""
+        # Check directory exists (one stat for both checks)
+        try:
+            st = os.stat(skill_path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None, f"Skill directory does not exist: {skill_path}"
+        
+        if not stat.S_ISDIR(st.st_mode):
+            return None, f"Skill path is not a directory: {skill_path}"
         
         # Parse YAML
         try:
-            with open(yaml_path, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f)
+            data = _read_yaml_cached(skill_path / "SKILL.yaml")
+        except FileNotFoundError:
+            return None, "SKILL.yaml not found"
         except yaml.YAMLError as e:
-            errors.append(f"YAML parse error: {e}")
-            return False, errors
+            return None, f"YAML parse error: {e}"
         
         if data is None:
-            errors.append("SKILL.yaml is empty")
-            return False, errors
+            return None, "SKILL.yaml is empty"
         
+        return data, None
+    
+    def _iter_data_errors(self, skill_path: Path, data: dict) -> Iterator[str]:
+        """Yield field-level errors for parsed SKILL.yaml data."""
         # Validate required fields
+        missing = False
         for field in self.REQUIRED_FIELDS:
             if field not in data:
-                errors.append(f"Missing required field: {field}")
+                missing = True
+                yield f"Missing required field: {field}"
         
-        if errors:
-            return False, errors
+        if missing:
+            return
+        
+        # Required fields are all present now; read each value once
+        name = data['name']
+        version = data['version']
+        if not isinstance(version, str):
+            version = str(version)
+        description = data['description'] or ''
+        triggers = data['triggers']
+        requires_approval = data['requires_approval']
+        instructions_file = data['instructions_file']
         
         # Validate name
-        name = data.get('name', '')
         if not name:
-            errors.append("name cannot be empty")
-        elif not re.match(r'^[a-z0-9][a-z0-9\-]*[a-z0-9]$|^[a-z0-9]$', name):
-            errors.append("name must be lowercase, start/end with alphanumeric, use hyphens only")
+            yield "name cannot be empty"
+        elif not self.NAME_PATTERN.fullmatch(name):
+            yield "name must be lowercase, start/end with alphanumeric, use hyphens only"
         
         # Validate version (semver)
-        version = data.get('version', '')
-        if not self.SEMVER_PATTERN.match(str(version)):
-            errors.append(f"version must be semver format (X.Y.Z), got: {version}")
+        if not self.SEMVER_PATTERN.fullmatch(version):
+            yield f"version must be semver format (X.Y.Z), got: {version}"
         
         # Validate description length
-        description = data.get('description', '')
         if len(description) > 500:
-            errors.append(f"description exceeds 500 characters (got {len(description)})")
+            yield f"description exceeds 500 characters (got {len(description)})"
         
         # Validate triggers
-        triggers = data.get('triggers', [])
         if not isinstance(triggers, list):
-            errors.append("triggers must be a list")
+            yield "triggers must be a list"
         elif len(triggers) == 0:
-            errors.append("triggers must have at least one entry")
+            yield "triggers must have at least one entry"
         else:
             for i, trigger in enumerate(triggers):
                 if not isinstance(trigger, dict):
-                    errors.append(f"trigger[{i}] must be a dict")
+                    yield f"trigger[{i}] must be a dict"
                     continue
                 if 'pattern' not in trigger:
-                    errors.append(f"trigger[{i}] missing 'pattern'")
+                    yield f"trigger[{i}] missing 'pattern'"
                 elif not trigger['pattern']:
-                    errors.append(f"trigger[{i}] pattern cannot be empty")
+                    yield f"trigger[{i}] pattern cannot be empty"
                 
                 threshold = trigger.get('confidence_threshold', 0.8)
                 if not isinstance(threshold, (int, float)):
-                    errors.append(f"trigger[{i}] confidence_threshold must be a number")
+                    yield f"trigger[{i}] confidence_threshold must be a number"
                 elif not (0.5 <= threshold <= 1.0):
-                    errors.append(f"trigger[{i}] confidence_threshold must be between 0.5 and 1.0")
+                    yield f"trigger[{i}] confidence_threshold must be between 0.5 and 1.0"
         
         # Validate dependencies
         dependencies = data.get('dependencies', [])
         if not isinstance(dependencies, list):
-            errors.append("dependencies must be a list")
+            yield "dependencies must be a list"
         
         # Validate requires_approval
-        requires_approval = data.get('requires_approval')
         if not isinstance(requires_approval, bool):
-            errors.append("requires_approval must be a boolean")
+            yield "requires_approval must be a boolean"
         
         # Validate instructions_file exists
-        instructions_file = data.get('instructions_file', 'instructions.md')
-        instructions_path = skill_path / instructions_file
-        if not instructions_path.exists():
-            errors.append(f"instructions_file not found: {instructions_file}")
-        
-        return len(errors) == 0, errors
+        try:
+            os.stat(skill_path / instructions_file)
+        except (FileNotFoundError, NotADirectoryError):
+            yield f"instructions_file not found: {instructions_file}"
     
     def load_instructions(self, metadata: SkillMetadata, skill_path: Path) -> str:
         """
@@ -190,13 +286,13 @@ class SkillLoader:
         """
         instructions_path = skill_path / metadata.instructions_file
         
-        if not instructions_path.exists():
+        try:
+            with open(instructions_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
             raise FileNotFoundError(
                 f"Instructions file not found: {instructions_path}"
-            )
-        
-        with open(instructions_path, 'r', encoding='utf-8') as f:
-            return f.read()
+            ) from None
     
     def get_skill_resources(self, skill_path: Path, resource_name: str) -> Optional[Path]:
         """
@@ -226,9 +322,17 @@ class SkillLoader:
         Returns:
             List of paths to resource files
         """
-        resources_dir = skill_path / "resources"
-        
-        if not resources_dir.exists():
-            return []
+        resources = []
+        stack = [os.path.join(skill_path, "resources")]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        resources.append(Path(entry.path))
+                        # d_type from the dirent - no extra stat on Linux
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
         
-        return list(resources_dir.rglob("*"))
+        return resources
@@ -7,15 +7,40 @@ Handles:
 - Skill metadata caching for progressive disclosure
 """
 
+import hashlib
+import os
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 from noctem.db import get_db
-from noctem.models import Skill, SkillTrigger
+from noctem.models import Skill, SkillMetadata, SkillTrigger, json_column
 from noctem.skills.loader import SkillLoader
 
 
+# Insert a skill, or refresh its metadata if the name is already registered
+# (enabled flag and usage counters are left alone on update). Rows whose
+# content_hash is unchanged are not rewritten at all.
+_UPSERT_SKILL = """
+    INSERT INTO skills (
+        name, version, source, skill_path, description,
+        triggers, dependencies, requires_approval, content_hash, enabled,
+        use_count, success_count, failure_count, created_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, 0, 0, 0, ?)
+    ON CONFLICT(name) DO UPDATE SET
+        version = excluded.version,
+        source = excluded.source,
+        skill_path = excluded.skill_path,
+        description = excluded.description,
+        triggers = excluded.triggers,
+        dependencies = excluded.dependencies,
+        requires_approval = excluded.requires_approval,
+        content_hash = excluded.content_hash,
+        updated_at = excluded.created_at
+    WHERE skills.content_hash IS NOT excluded.content_hash
+"""
+
+
 class SkillRegistry:
     """
     Manages skill registration and discovery.
@@ -52,39 +77,52 @@ class SkillRegistry:
         Scan bundled and user skill directories, validate, and register in DB.
         
         Returns:
-            List of discovered and registered skills
+            List of discovered and registered skills, one per name (a user
+            skill replaces a bundled skill of the same name)
         """
-        discovered = []
-        
         # Ensure directories exist
         self.bundled_path.mkdir(parents=True, exist_ok=True)
         self.user_path.mkdir(parents=True, exist_ok=True)
         
-        # Discover bundled skills
-        for skill_dir in self._list_skill_dirs(self.bundled_path):
-            skill = self._register_skill(skill_dir, source="bundled")
-            if skill:
-                discovered.append(skill)
+        # Parse everything first (bundled, then user, so user skills win
+        # on a name clash), then register in one transaction
+        now = datetime.now().isoformat()
+        rows = []
+        for source, parent_path in (("bundled", self.bundled_path), ("user", self.user_path)):
+            for skill_dir in self._list_skill_dirs(parent_path):
+                metadata = self._parse_skill(skill_dir)
+                if metadata:
+                    rows.append(self._skill_row(metadata, skill_dir, source, now))
         
-        # Discover user skills
-        for skill_dir in self._list_skill_dirs(self.user_path):
-            skill = self._register_skill(skill_dir, source="user")
-            if skill:
-                discovered.append(skill)
+        if not rows:
+            return []
         
-        return discovered
+        names = list(dict.fromkeys(row[0] for row in rows))
+        placeholders = ",".join("?" * len(names))
+        with get_db() as conn:
+            conn.executemany(_UPSERT_SKILL, rows)
+            registered = {
+                skill.name: skill
+                for skill in Skill.from_rows(conn.execute(
+                    f"SELECT * FROM skills WHERE name IN ({placeholders})", names
+                ).fetchall())
+            }
+        
+        return [registered[name] for name in names if name in registered]
     
     def _list_skill_dirs(self, parent_path: Path) -> list[Path]:
         """List all valid skill directories in a parent directory."""
         if not parent_path.exists():
             return []
         
-        skill_dirs = []
-        for item in parent_path.iterdir():
-            if item.is_dir() and (item / "SKILL.yaml").exists():
-                skill_dirs.append(item)
-        
-        return skill_dirs
+        # DirEntry.is_dir() uses the file type scandir already read, so only
+        # the SKILL.yaml check costs a stat (symlinked dirs are still followed)
+        with os.scandir(parent_path) as entries:
+            return [
+                Path(entry.path)
+                for entry in entries
+                if entry.is_dir() and os.path.exists(os.path.join(entry.path, "SKILL.yaml"))
+            ]
     
     def _register_skill(self, skill_path: Path, source: str) -> Optional[Skill]:
         """
@@ -97,77 +135,53 @@ class SkillRegistry:
         Returns:
             Registered Skill or None if validation failed
         """
-        # Validate skill
-        is_valid, errors = self.loader.validate_skill(skill_path)
-        if not is_valid:
+        metadata = self._parse_skill(skill_path)
+        if metadata is None:
             return None
         
-        # Parse metadata
+        with get_db() as conn:
+            conn.execute(_UPSERT_SKILL, self._skill_row(
+                metadata, skill_path, source, datetime.now().isoformat()
+            ))
+            row = conn.execute(
+                "SELECT * FROM skills WHERE name = ?",
+                (metadata.name,)
+            ).fetchone()
+        return Skill.from_row(row) if row else None
+    
+    def _parse_skill(self, skill_path: Path) -> Optional[SkillMetadata]:
+        """Parse and validate SKILL.yaml (one parse), or None if invalid."""
         try:
-            metadata = self.loader.parse_skill_yaml(skill_path)
+            metadata, errors = self.loader.parse_and_validate(skill_path)
         except Exception:
             return None
-        
-        # Check if skill already exists
-        existing = self.get_skill(metadata.name)
-        
-        with get_db() as conn:
-            if existing:
-                # Update existing skill
-                conn.execute("""
-                    UPDATE skills SET
-                        version = ?,
-                        source = ?,
-                        skill_path = ?,
-                        description = ?,
-                        triggers = ?,
-                        dependencies = ?,
-                        requires_approval = ?,
-                        updated_at = ?
-                    WHERE name = ?
-                """, (
-                    metadata.version,
-                    source,
-                    str(skill_path),
-                    metadata.description,
-                    self._triggers_to_json(metadata.triggers),
-                    self._deps_to_json(metadata.dependencies),
-                    1 if metadata.requires_approval else 0,
-                    datetime.now().isoformat(),
-                    metadata.name,
-                ))
-                return self.get_skill(metadata.name)
-            else:
-                # Insert new skill
-                conn.execute("""
-                    INSERT INTO skills (
-                        name, version, source, skill_path, description,
-                        triggers, dependencies, requires_approval, enabled,
-                        use_count, success_count, failure_count, created_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, 0, 0, 0, ?)
-                """, (
-                    metadata.name,
-                    metadata.version,
-                    source,
-                    str(skill_path),
-                    metadata.description,
-                    self._triggers_to_json(metadata.triggers),
-                    self._deps_to_json(metadata.dependencies),
-                    1 if metadata.requires_approval else 0,
-                    datetime.now().isoformat(),
-                ))
-        # Commit happens when exiting the with block
-        return self.get_skill(metadata.name)
+        return metadata
+    
+    def _skill_row(self, metadata: SkillMetadata, skill_path: Path, source: str, now: str) -> tuple:
+        """Parameters for _UPSERT_SKILL (now is the ISO timestamp to record)."""
+        values = (
+            metadata.name,
+            metadata.version,
+            source,
+            str(skill_path),
+            metadata.description,
+            self._triggers_to_json(metadata.triggers),
+            self._deps_to_json(metadata.dependencies),
+            1 if metadata.requires_approval else 0,
+        )
+        # Hash of every column the upsert would update
+        content_hash = hashlib.blake2b(
+            "\x1f".join(map(str, values)).encode(), digest_size=16
+        ).hexdigest()
+        return values + (content_hash, now)
     
     def _triggers_to_json(self, triggers: list[SkillTrigger]) -> str:
         """Convert triggers list to JSON string."""
-        import json
-        return json.dumps([t.to_dict() for t in triggers])
+        return json_column([t.to_dict() for t in triggers]) or "[]"
     
     def _deps_to_json(self, dependencies: list[str]) -> str:
         """Convert dependencies list to JSON string."""
-        import json
-        return json.dumps(dependencies)
+        return json_column(dependencies) or "[]"
     
     def get_skill(self, name: str) -> Optional[Skill]:
         """
@@ -209,7 +223,7 @@ class SkillRegistry:
                     "SELECT * FROM skills ORDER BY name"
                 ).fetchall()
             
-            return [Skill.from_row(row) for row in rows]
+            return Skill.from_rows(rows)
     
     def enable_skill(self, name: str) -> bool:
         """
@@ -288,6 +302,7 @@ class SkillRegistry:
         Returns:
             True if updated, False if skill not found
         """
+        now = datetime.now().isoformat()
         with get_db() as conn:
             if success:
                 result = conn.execute("""
@@ -297,7 +312,7 @@ class SkillRegistry:
                         last_used = ?,
                         updated_at = ?
                     WHERE name = ?
-                """, (datetime.now().isoformat(), datetime.now().isoformat(), name))
+                """, (now, now, name))
             else:
                 result = conn.execute("""
                     UPDATE skills SET
@@ -306,7 +321,7 @@ class SkillRegistry:
                         last_used = ?,
                         updated_at = ?
                     WHERE name = ?
-                """, (datetime.now().isoformat(), datetime.now().isoformat(), name))
+                """, (now, now, name))
             
             return result.rowcount > 0
     
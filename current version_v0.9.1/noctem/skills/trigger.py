@@ -56,7 +56,7 @@ class SkillTriggerDetector:
                 continue
             
             for trigger in skill.triggers:
-                pattern = trigger.pattern.lower()
+                pattern = trigger.match_key
                 self.trigger_index[pattern] = (
                     skill.name,
                     trigger.confidence_threshold,
@@ -193,7 +193,7 @@ class SkillTriggerDetector:
         self.skills.append(skill)
         
         for trigger in skill.triggers:
-            pattern = trigger.pattern.lower()
+            pattern = trigger.match_key
             self.trigger_index[pattern] = (
                 skill.name,
                 trigger.confidence_threshold,
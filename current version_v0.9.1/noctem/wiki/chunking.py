@@ -5,9 +5,11 @@ Splits documents into searchable chunks with overlap and section detection.
 Target: 500-1000 tokens per chunk with 100-token overlap.
 """
 
+import bisect
+import hashlib
 import re
 import uuid
-from typing import List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
 from dataclasses import dataclass
 
 from noctem.db import get_db
@@ -23,8 +25,19 @@ MAX_CHUNK_TOKENS = 1000
 TARGET_CHUNK_TOKENS = 700
 OVERLAP_TOKENS = 100
 
+# Chunks whose SimHashes differ in fewer bits than this are near-duplicates
+SIMHASH_DUPLICATE_DISTANCE = 4
 
-@dataclass
+_WORD_RE = re.compile(r"\w+")
+_PAGE_RE = re.compile(r"\[PAGE (\d+)\]")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+)$", re.MULTILINE)
+# Matches the terminator too: a lookbehind is retried at every position and
+# scans far slower than a leading character class
+_SENTENCE_BREAK_RE = re.compile(r"[.!?]\s+")
+_PARAGRAPH_BREAK_RE = re.compile(r"\n\s*\n")
+
+
+@dataclass(slots=True)
 class TextChunk:
     """Intermediate representation of a text chunk before DB storage."""
     content: str
@@ -45,9 +58,37 @@ def tokens_to_chars(tokens: int) -> int:
     return tokens * CHARS_PER_TOKEN
 
 
+def content_simhash(text: str) -> int:
+    """
+    64-bit SimHash of the text's lowercased word trigrams.
+    
+    Near-identical passages get hashes only a few bits apart. Shingles are
+    hashed with BLAKE2b rather than hash() so values are stable across runs,
+    and the result is signed so it fits an SQLite INTEGER.
+    """
+    words = _WORD_RE.findall(text.lower())
+    shingles = {" ".join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))}
+    bits = [
+        format(int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big"), "064b")
+        for s in shingles
+    ]
+    
+    # Each output bit is the majority vote of that bit across shingle hashes
+    half = len(bits) / 2
+    value = 0
+    for column in zip(*bits):
+        value = (value << 1) | (column.count("1") > half)
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def simhash_distance(a: int, b: int) -> int:
+    """Number of bits that differ between two SimHashes."""
+    return ((a ^ b) & 0xFFFFFFFFFFFFFFFF).bit_count()
+
+
 def extract_page_number(text: str) -> Optional[str]:
     """Extract page marker from text if present."""
-    match = re.search(r"\[PAGE (\d+)\]", text)
+    match = _PAGE_RE.search(text)
     if match:
         return f"p.{match.group(1)}"
     return None
@@ -56,7 +97,7 @@ def extract_page_number(text: str) -> Optional[str]:
 def extract_markdown_section(text: str) -> Optional[str]:
     """Extract the most recent markdown heading from text."""
     # Find all headings in the text
-    headings = re.findall(r"^(#{1,6})\s+(.+)$", text, re.MULTILINE)
+    headings = _HEADING_RE.findall(text)
     if headings:
         # Return the last (most recent) heading
         level, title = headings[-1]
@@ -85,59 +126,113 @@ def find_section_context(full_text: str, position: int) -> Optional[str]:
     return None
 
 
-def split_into_sentences(text: str) -> List[Tuple[str, int]]:
+class _SectionIndex:
     """
-    Split text into sentences with their starting positions.
+    Page markers and markdown headings of a document, located once.
     
-    Returns:
-        List of (sentence, start_position) tuples.
+    at(position) gives the same answer as find_section_context(text, position)
+    by bisecting the match offsets instead of re-scanning the text before
+    each position.
+    """
+    
+    __slots__ = ("text", "page_starts", "pages", "heading_starts", "heading_ends", "headings")
+    
+    def __init__(self, text: str):
+        self.text = text
+        pages = list(_PAGE_RE.finditer(text))
+        self.page_starts = [m.start() for m in pages]
+        self.pages = pages
+        headings = list(_HEADING_RE.finditer(text))
+        self.heading_starts = [m.start() for m in headings]
+        self.heading_ends = [m.end() for m in headings]
+        self.headings = headings
+    
+    def at(self, position: int) -> Optional[str]:
+        # Page marker: the first one lying wholly in the 500 chars before position
+        i = bisect.bisect_left(self.page_starts, max(0, position - 500))
+        if i < len(self.pages) and self.pages[i].end() <= position:
+            return f"p.{self.pages[i].group(1)}"
+        
+        # Heading: the last one ending at or before position...
+        i = bisect.bisect_right(self.heading_ends, position)
+        # ...unless the next one starts before position, in which case the
+        # text up to position may still hold a (truncated) heading line
+        match = None
+        if i < len(self.headings) and self.heading_starts[i] < position:
+            match = _HEADING_RE.match(self.text, self.heading_starts[i], position)
+        if match is None and i > 0:
+            match = self.headings[i - 1]
+        
+        # A heading whose title is only whitespace counts as no section
+        title = match.group(2).strip() if match else ""
+        return f"## {title}" if title else None
+
+
+def iter_sentences(text: str) -> Iterator[Tuple[str, int]]:
     """
-    # Sentence-ending patterns (simplified)
-    sentence_pattern = r'(?<=[.!?])\s+'
+    Yield sentences with their starting positions, one at a time.
     
-    sentences = []
+    Yields:
+        (sentence, start_position) tuples.
+    """
     current_pos = 0
     
-    for match in re.finditer(sentence_pattern, text):
-        end_pos = match.start()
-        sentence = text[current_pos:end_pos + 1].strip()
+    for match in _SENTENCE_BREAK_RE.finditer(text):
+        sentence = text[current_pos:match.start() + 1].strip()
         if sentence:
-            sentences.append((sentence, current_pos))
+            yield sentence, current_pos
         current_pos = match.end()
     
     # Don't forget the last sentence
     if current_pos < len(text):
         last_sentence = text[current_pos:].strip()
         if last_sentence:
-            sentences.append((last_sentence, current_pos))
-    
-    return sentences
+            yield last_sentence, current_pos
 
 
-def split_into_paragraphs(text: str) -> List[Tuple[str, int]]:
+def split_into_sentences(text: str) -> List[Tuple[str, int]]:
     """
-    Split text into paragraphs with their starting positions.
+    Split text into sentences with their starting positions.
     
     Returns:
-        List of (paragraph, start_position) tuples.
+        List of (sentence, start_position) tuples.
+    """
+    return list(iter_sentences(text))
+
+
+def iter_paragraphs(text: str) -> Iterator[Tuple[str, int]]:
+    """
+    Yield paragraphs with their starting positions, one at a time.
+    
+    Non-blank text always yields at least one paragraph.
+    
+    Yields:
+        (paragraph, start_position) tuples.
     """
-    paragraphs = []
     current_pos = 0
     
     # Split on double newlines
-    for match in re.finditer(r'\n\s*\n', text):
+    for match in _PARAGRAPH_BREAK_RE.finditer(text):
         para = text[current_pos:match.start()].strip()
         if para:
-            paragraphs.append((para, current_pos))
+            yield para, current_pos
         current_pos = match.end()
     
     # Don't forget the last paragraph
     if current_pos < len(text):
         last_para = text[current_pos:].strip()
         if last_para:
-            paragraphs.append((last_para, current_pos))
+            yield last_para, current_pos
+
+
+def split_into_paragraphs(text: str) -> List[Tuple[str, int]]:
+    """
+    Split text into paragraphs with their starting positions.
     
-    return paragraphs
+    Returns:
+        List of (paragraph, start_position) tuples.
+    """
+    return list(iter_paragraphs(text))
 
 
 def chunk_text(
@@ -176,60 +271,64 @@ def chunk_text(
     chunks = []
     chunk_index = 0
     
-    # First pass: split into paragraphs
-    paragraphs = split_into_paragraphs(text)
-    
-    if not paragraphs:
-        # Fallback: treat entire text as one paragraph
-        paragraphs = [(text.strip(), 0)]
-    
-    current_chunk_text = ""
+    # The chunk being built: its pieces (joined with blank lines when it is
+    # finalized) and the length the joined text will have
+    current_parts = []
+    current_len = 0
     current_chunk_start = 0
+    sections = _SectionIndex(text)
     
-    for para_text, para_start in paragraphs:
+    # Paragraphs are consumed as they are found (text is known non-blank,
+    # so there is always at least one)
+    for para_text, para_start in iter_paragraphs(text):
         para_tokens = estimate_tokens(para_text)
-        current_tokens = estimate_tokens(current_chunk_text)
+        current_tokens = current_len // CHARS_PER_TOKEN
         
         # If adding this paragraph would exceed max, finalize current chunk
-        if current_chunk_text and (current_tokens + para_tokens) > max_tokens:
+        if current_parts and (current_tokens + para_tokens) > max_tokens:
             # Finalize current chunk
-            section = find_section_context(text, current_chunk_start)
+            current_chunk_text = "\n\n".join(current_parts)
+            section = sections.at(current_chunk_start)
             chunks.append(TextChunk(
                 content=current_chunk_text.strip(),
                 page_or_section=section,
                 chunk_index=chunk_index,
                 start_char=current_chunk_start,
-                end_char=current_chunk_start + len(current_chunk_text),
-                token_count=estimate_tokens(current_chunk_text),
+                end_char=current_chunk_start + current_len,
+                token_count=current_tokens,
             ))
             chunk_index += 1
             
             # Start new chunk with overlap from previous
-            if overlap_chars > 0 and len(current_chunk_text) > overlap_chars:
+            if overlap_chars > 0 and current_len > overlap_chars:
                 overlap_text = current_chunk_text[-overlap_chars:]
-                current_chunk_text = overlap_text + "\n\n" + para_text
-                current_chunk_start = para_start - len(overlap_text)
+                current_parts = [overlap_text, para_text]
+                current_len = overlap_chars + 2 + len(para_text)
+                current_chunk_start = para_start - overlap_chars
             else:
-                current_chunk_text = para_text
+                current_parts = [para_text]
+                current_len = len(para_text)
                 current_chunk_start = para_start
         else:
             # Add paragraph to current chunk
-            if current_chunk_text:
-                current_chunk_text += "\n\n" + para_text
+            if current_parts:
+                current_len += 2 + len(para_text)
             else:
-                current_chunk_text = para_text
+                current_len = len(para_text)
                 current_chunk_start = para_start
+            current_parts.append(para_text)
     
-    # Don't forget the last chunk
-    if current_chunk_text.strip():
-        section = find_section_context(text, current_chunk_start)
+    # Don't forget the last chunk (paragraphs are stripped and non-empty,
+    # so any parts at all mean non-blank text)
+    if current_parts:
+        section = sections.at(current_chunk_start)
         chunks.append(TextChunk(
-            content=current_chunk_text.strip(),
+            content="\n\n".join(current_parts).strip(),
             page_or_section=section,
             chunk_index=chunk_index,
             start_char=current_chunk_start,
-            end_char=current_chunk_start + len(current_chunk_text),
-            token_count=estimate_tokens(current_chunk_text),
+            end_char=current_chunk_start + current_len,
+            token_count=current_len // CHARS_PER_TOKEN,
         ))
     
     # Handle chunks that are too small by merging
@@ -256,20 +355,31 @@ def _merge_small_chunks(chunks: List[TextChunk], min_tokens: int) -> List[TextCh
     while i < len(chunks):
         current = chunks[i]
         
-        # If current chunk is too small and there's a next chunk, merge
-        while current.token_count < min_tokens and i + 1 < len(chunks):
+        if current.token_count >= min_tokens or i + 1 >= len(chunks):
+            merged.append(current)
+            i += 1
+            continue
+        
+        # Too small: absorb following chunks until the group is big enough,
+        # then build a single merged chunk for the whole group
+        parts = [current.content]
+        tokens = current.token_count
+        end_char = current.end_char
+        while tokens < min_tokens and i + 1 < len(chunks):
             next_chunk = chunks[i + 1]
-            current = TextChunk(
-                content=current.content + "\n\n" + next_chunk.content,
-                page_or_section=current.page_or_section,  # Keep first section
-                chunk_index=current.chunk_index,
-                start_char=current.start_char,
-                end_char=next_chunk.end_char,
-                token_count=current.token_count + next_chunk.token_count,
-            )
+            parts.append(next_chunk.content)
+            tokens += next_chunk.token_count
+            end_char = next_chunk.end_char
             i += 1
         
-        merged.append(current)
+        merged.append(TextChunk(
+            content="\n\n".join(parts),
+            page_or_section=current.page_or_section,  # Keep first section
+            chunk_index=current.chunk_index,
+            start_char=current.start_char,
+            end_char=end_char,
+            token_count=tokens,
+        ))
         i += 1
     
     return merged
@@ -284,40 +394,42 @@ def _split_large_chunks(chunks: List[TextChunk], max_tokens: int) -> List[TextCh
             result.append(chunk)
             continue
         
-        # Split on sentences
-        sentences = split_into_sentences(chunk.content)
-        
-        current_text = ""
+        # Split on sentences, tracking the joined length of the sub-chunk
+        # being built rather than re-measuring a growing string
+        current_parts = []
+        current_len = 0
         current_start = chunk.start_char
         
-        for sentence, rel_pos in sentences:
+        for sentence, rel_pos in iter_sentences(chunk.content):
             sentence_tokens = estimate_tokens(sentence)
-            current_tokens = estimate_tokens(current_text)
+            current_tokens = current_len // CHARS_PER_TOKEN
             
-            if current_text and (current_tokens + sentence_tokens) > max_tokens:
+            if current_parts and (current_tokens + sentence_tokens) > max_tokens:
                 # Finalize current sub-chunk
                 result.append(TextChunk(
-                    content=current_text.strip(),
+                    content=" ".join(current_parts),
                     page_or_section=chunk.page_or_section,
                     chunk_index=chunk.chunk_index,
                     start_char=current_start,
-                    end_char=current_start + len(current_text),
-                    token_count=estimate_tokens(current_text),
+                    end_char=current_start + current_len,
+                    token_count=current_tokens,
                 ))
-                current_text = sentence
+                current_parts = [sentence]
+                current_len = len(sentence)
                 current_start = chunk.start_char + rel_pos
             else:
-                current_text += " " + sentence if current_text else sentence
+                current_len += len(sentence) + 1 if current_parts else len(sentence)
+                current_parts.append(sentence)
         
-        # Last sub-chunk
-        if current_text.strip():
+        # Last sub-chunk (sentences are stripped and non-empty)
+        if current_parts:
             result.append(TextChunk(
-                content=current_text.strip(),
+                content=" ".join(current_parts),
                 page_or_section=chunk.page_or_section,
                 chunk_index=chunk.chunk_index,
                 start_char=current_start,
-                end_char=current_start + len(current_text),
-                token_count=estimate_tokens(current_text),
+                end_char=current_start + current_len,
+                token_count=current_len // CHARS_PER_TOKEN,
             ))
     
     return result
@@ -330,35 +442,46 @@ def save_chunks(source_id: int, chunks: List[TextChunk]) -> List[KnowledgeChunk]
     Returns:
         List of saved KnowledgeChunk objects with IDs.
     """
-    saved_chunks = []
+    saved_chunks = [
+        KnowledgeChunk(
+            source_id=source_id,
+            chunk_id=str(uuid.uuid4()),
+            content=chunk.content,
+            page_or_section=chunk.page_or_section,
+            chunk_index=chunk.chunk_index,
+            token_count=chunk.token_count,
+            start_char=chunk.start_char,
+            end_char=chunk.end_char,
+            content_simhash=content_simhash(chunk.content),
+        )
+        for chunk in chunks
+    ]
     
     with get_db() as conn:
-        for chunk in chunks:
-            chunk_id = str(uuid.uuid4())
-            
-            cursor = conn.execute(
-                """
-                INSERT INTO knowledge_chunks (
-                    source_id, chunk_id, content, page_or_section,
-                    chunk_index, token_count, start_char, end_char, created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """,
-                (source_id, chunk_id, chunk.content, chunk.page_or_section,
-                 chunk.chunk_index, chunk.token_count, chunk.start_char, chunk.end_char)
-            )
-            
-            saved_chunks.append(KnowledgeChunk(
-                id=cursor.lastrowid,
-                source_id=source_id,
-                chunk_id=chunk_id,
-                content=chunk.content,
-                page_or_section=chunk.page_or_section,
-                chunk_index=chunk.chunk_index,
-                token_count=chunk.token_count,
-                start_char=chunk.start_char,
-                end_char=chunk.end_char,
-            ))
+        conn.executemany(
+            """
+            INSERT INTO knowledge_chunks (
+                source_id, chunk_id, content, page_or_section,
+                chunk_index, token_count, start_char, end_char, content_simhash,
+                created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """,
+            [(c.source_id, c.chunk_id, c.content, c.page_or_section, c.chunk_index,
+              c.token_count, c.start_char, c.end_char, c.content_simhash)
+             for c in saved_chunks]
+        )
+        
+        # executemany doesn't report row IDs; read them back in one query
+        ids = dict(conn.execute(
+            "SELECT chunk_id, id FROM knowledge_chunks WHERE source_id = ?",
+            (source_id,)
+        ).fetchall())
+    
+    for chunk in saved_chunks:
+        chunk.id = ids[chunk.chunk_id]
     
+    from noctem.wiki.retrieval import invalidate_wiki_caches
+    invalidate_wiki_caches()
     return saved_chunks
 
 
@@ -373,7 +496,7 @@ def get_chunks_for_source(source_id: int) -> List[KnowledgeChunk]:
             """,
             (source_id,)
         ).fetchall()
-        return [KnowledgeChunk.from_row(row) for row in rows]
+        return KnowledgeChunk.from_rows(rows)
 
 
 def get_chunk_by_id(chunk_id: str) -> Optional[KnowledgeChunk]:
@@ -386,6 +509,20 @@ def get_chunk_by_id(chunk_id: str) -> Optional[KnowledgeChunk]:
         return KnowledgeChunk.from_row(row) if row else None
 
 
+def get_chunks_by_ids(chunk_ids) -> Dict[str, KnowledgeChunk]:
+    """Get several chunks by UUID in one query, keyed by UUID. Missing IDs are omitted."""
+    chunk_ids = list(set(chunk_ids))
+    if not chunk_ids:
+        return {}
+    placeholders = ",".join("?" * len(chunk_ids))
+    with get_db() as conn:
+        rows = conn.execute(
+            f"SELECT * FROM knowledge_chunks WHERE chunk_id IN ({placeholders})",
+            chunk_ids,
+        ).fetchall()
+        return {chunk.chunk_id: chunk for chunk in KnowledgeChunk.from_rows(rows)}
+
+
 def delete_chunks_for_source(source_id: int) -> int:
     """Delete all chunks for a source. Returns count deleted."""
     with get_db() as conn:
@@ -393,4 +530,7 @@ def delete_chunks_for_source(source_id: int) -> int:
             "DELETE FROM knowledge_chunks WHERE source_id = ?",
             (source_id,)
         )
-        return cursor.rowcount
+    
+    from noctem.wiki.retrieval import invalidate_wiki_caches
+    invalidate_wiki_caches()
+    return cursor.rowcount
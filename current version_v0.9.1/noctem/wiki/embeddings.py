@@ -4,13 +4,39 @@ Wiki Embeddings Module (v0.9.0)
 Handles embedding generation via Ollama and vector storage via ChromaDB.
 """
 
+import asyncio
+import hashlib
+import logging
+import os
+import queue
+import random
+import re
+import sqlite3
+import threading
+import time
+import httpx
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Optional, Tuple
 from pathlib import Path
 
 from noctem.wiki import CHROMA_DIR
 from noctem.models import KnowledgeChunk
 
+# Optional: orjson decodes Ollama's float arrays several times faster
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    _json_loads = json.loads
+
+
+logger = logging.getLogger(__name__)
 
 # Default embedding model (via Ollama)
 DEFAULT_EMBEDDING_MODEL = "nomic-embed-text"
@@ -19,13 +45,91 @@ OLLAMA_BASE_URL = "http://localhost:11434"
 # ChromaDB collection name
 WIKI_COLLECTION_NAME = "noctem_wiki"
 
+# Number of concurrent embedding requests sent to Ollama
+DEFAULT_EMBED_CONCURRENCY = int(os.environ.get("NOCTEM_EMBED_CONCURRENCY", "4"))
+
+# Max random delay (seconds) before each worker's request, so a large batch
+# doesn't hit Ollama with every request at the same instant
+EMBED_JITTER_SECONDS = 0.05
+
+# Chunks embedded and written to ChromaDB per batch during ingest
+INGEST_BATCH_SIZE = 512
+
+# Seconds to reuse a check_ollama_available() result; failures expire much
+# sooner so the wiki notices Ollama (or a pulled model) right after startup
+OLLAMA_CHECK_TTL_SECONDS = 30
+OLLAMA_CHECK_FAILURE_TTL_SECONDS = 2
+
+# Persistent embedding cache (survives re-ingests and restarts)
+EMBED_CACHE_PATH = CHROMA_DIR / "embed_cache.sqlite"
+
+# Set NOCTEM_STRICT_EMBED=1 to only reuse cached embeddings for byte-identical
+# text (disables the whitespace/case-insensitive fallback lookup)
+STRICT_EMBED_CACHE = os.environ.get("NOCTEM_STRICT_EMBED") == "1"
+
+# In-process cache of recent query embeddings (exact query text matches)
+QUERY_CACHE_SIZE = int(os.environ.get("NOCTEM_QUERY_CACHE_SIZE", "1024"))
+
+# Semantic query cache: paraphrased queries reuse earlier search results.
+# Off by default, since queries that embed close together can still ask
+# different things ("how to add X" / "how to delete X"); set
+# NOCTEM_SEMANTIC_CACHE=1 or pass use_semantic_cache=True to opt in
+SEMANTIC_CACHE_ENABLED = os.environ.get("NOCTEM_SEMANTIC_CACHE") == "1"
+SEMANTIC_CACHE_SIZE = 256
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("NOCTEM_SEMANTIC_CACHE_THRESHOLD", "0.86"))
+SEMANTIC_CACHE_MERGE_THRESHOLD = 0.95
+
 
 class EmbeddingError(Exception):
     """Raised when embedding generation fails."""
     pass
 
 
-def get_ollama_embedding(text: str, model: str = DEFAULT_EMBEDDING_MODEL) -> List[float]:
+_session_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+
+
+def _get_session() -> requests.Session:
+    """
+    Shared HTTP session for all Ollama calls.
+    
+    Keeps connections alive across requests (and across the embedding
+    thread pool), and retries transient 429/5xx responses with backoff.
+    """
+    global _session
+    if _session is not None:
+        return _session
+    
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=3,
+                connect=0,  # Ollama not running - fail fast
+                backoff_factor=0.2,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset({"GET", "POST"}),
+                raise_on_status=False,
+            )
+            session = requests.Session()
+            session.mount(
+                "http://",
+                HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry),
+            )
+            _session = session
+    
+    return _session
+
+
+def _parse_embedding(content: bytes) -> np.ndarray:
+    """Decode an /api/embeddings response body into a unit float32 vector."""
+    data = _json_loads(content)
+    embedding = np.asarray(data.get("embedding", []), dtype=np.float32)
+    # Unit vectors make cosine distance exact and HNSW better behaved
+    embedding /= np.linalg.norm(embedding) + 1e-12
+    return embedding
+
+
+def get_ollama_embedding(text: str, model: str = DEFAULT_EMBEDDING_MODEL) -> np.ndarray:
     """
     Get embedding vector from Ollama.
     
@@ -34,21 +138,20 @@ def get_ollama_embedding(text: str, model: str = DEFAULT_EMBEDDING_MODEL) -> Lis
         model: Ollama model name (default: nomic-embed-text)
     
     Returns:
-        List of floats representing the embedding vector
+        L2-normalized float32 numpy array holding the embedding vector
     
     Raises:
         EmbeddingError: If Ollama is unavailable or request fails
     """
     try:
-        response = requests.post(
+        response = _get_session().post(
             f"{OLLAMA_BASE_URL}/api/embeddings",
             json={"model": model, "prompt": text},
             timeout=60,
         )
         response.raise_for_status()
         
-        data = response.json()
-        return data.get("embedding", [])
+        return _parse_embedding(response.content)
     
     except requests.exceptions.ConnectionError:
         raise EmbeddingError(
@@ -63,47 +166,432 @@ def get_ollama_embedding(text: str, model: str = DEFAULT_EMBEDDING_MODEL) -> Lis
         raise EmbeddingError(f"Embedding failed: {e}")
 
 
-def get_embeddings_batch(texts: List[str], model: str = DEFAULT_EMBEDDING_MODEL) -> List[List[float]]:
+class _EmbedCache:
+    """
+    Persistent embedding cache keyed by (model, SHA-256 of text).
+    
+    Vectors are stored as float32 bytes in a small SQLite file next to the
+    ChromaDB data, so unchanged content never goes back to Ollama.
+    Each row also carries a hash of the normalized text (whitespace collapsed,
+    lowercased), so re-ingesting a note after a trivial edit still hits.
+    Cache failures are treated as misses - they never break embedding.
+    """
+    
+    def __init__(self, path: Path, strict: bool = STRICT_EMBED_CACHE):
+        self.path = path
+        self.strict = strict
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        return re.sub(r"\s+", " ", text).strip().lower()
+    
+    def key(self, text: str) -> Tuple[bytes, Optional[bytes]]:
+        """Return (exact, normalized) hashes; normalized is None in strict mode."""
+        exact = hashlib.sha256(text.encode("utf-8")).digest()
+        if self.strict:
+            return exact, None
+        return exact, hashlib.sha256(self.normalize(text).encode("utf-8")).digest()
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "model TEXT, hash BLOB, norm_hash BLOB, vec BLOB, "
+                "PRIMARY KEY(model, hash))"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+            if "norm_hash" not in columns:
+                conn.execute("ALTER TABLE cache ADD COLUMN norm_hash BLOB")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_norm ON cache(model, norm_hash)"
+            )
+            self._conn = conn
+        return self._conn
+    
+    def get(self, model: str, key: Tuple[bytes, Optional[bytes]]) -> Optional[np.ndarray]:
+        exact, norm = key
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT vec FROM cache WHERE model = ? AND hash = ?", (model, exact)
+                ).fetchone()
+                if row is None and norm is not None:
+                    row = conn.execute(
+                        "SELECT vec FROM cache WHERE model = ? AND norm_hash = ? LIMIT 1",
+                        (model, norm),
+                    ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+    
+    def put_many(self, model: str, items: List[Tuple[Tuple[bytes, Optional[bytes]], np.ndarray]]):
+        rows = [
+            (model, exact, norm, np.asarray(vec, dtype=np.float32).tobytes())
+            for (exact, norm), vec in items
+            if len(vec)
+        ]
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.executemany(
+                    "INSERT OR IGNORE INTO cache (model, hash, norm_hash, vec) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                conn.commit()
+        except sqlite3.Error:
+            pass
+    
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_embed_cache: Optional[_EmbedCache] = None
+
+
+def _get_embed_cache() -> _EmbedCache:
+    global _embed_cache
+    if _embed_cache is None:
+        _embed_cache = _EmbedCache(EMBED_CACHE_PATH)
+    return _embed_cache
+
+
+def _cached_embedding(text: str, model: str = DEFAULT_EMBEDDING_MODEL) -> np.ndarray:
+    """Get an embedding, checking the persistent cache before calling Ollama."""
+    cache = _get_embed_cache()
+    key = cache.key(text)
+    embedding = cache.get(model, key)
+    if embedding is None:
+        embedding = get_ollama_embedding(text, model)
+        cache.put_many(model, [(key, embedding)])
+    return embedding
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _embed_query_cached(text: str, model: str) -> np.ndarray:
+    """
+    Embed a search query, memoized in-process.
+    
+    Repeating the exact same query within a session skips both Ollama and
+    the on-disk cache. Near-duplicate phrasings still miss here. The
+    returned array is shared between callers, so it is made read-only.
+    """
+    embedding = np.array(_cached_embedding(text, model), dtype=np.float32)
+    embedding.flags.writeable = False
+    return embedding
+
+
+class _QueryCache:
+    """
+    Small in-memory cache of recent query embeddings and their search results.
+    
+    A query whose embedding has cosine similarity >= threshold to a cached
+    query (searched with the same filters) reuses that query's results and
+    skips ChromaDB. Very close hits are folded into the cached row as a
+    running-mean centroid, so a cluster of paraphrases stays a single row.
+    Entries are evicted FIFO and the whole cache is dropped whenever the
+    collection changes.
+    """
+    
+    def __init__(
+        self,
+        max_size: int = SEMANTIC_CACHE_SIZE,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        merge_threshold: float = SEMANTIC_CACHE_MERGE_THRESHOLD,
+    ):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.merge_threshold = merge_threshold
+        self._lock = threading.Lock()
+        self._reset()
+    
+    def _reset(self):
+        self._matrix: Optional[np.ndarray] = None  # (N, D) float32, unit rows
+        self._keys: list = []
+        self._counts: List[int] = []
+        self._results: list = []
+    
+    def clear(self):
+        with self._lock:
+            self._reset()
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    @staticmethod
+    def normalize(embedding) -> Optional[np.ndarray]:
+        """L2-normalize an embedding to float32 (None for a zero vector)."""
+        q = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+        if not norm:
+            return None
+        return q / norm
+    
+    def lookup(self, q: np.ndarray, key: tuple) -> Optional[list]:
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != q.shape[0]:
+                return None
+            
+            sims = self._matrix @ q
+            for i, k in enumerate(self._keys):
+                if k != key:
+                    sims[i] = -1.0
+            
+            best = int(sims.argmax())
+            if sims[best] < self.threshold:
+                return None
+            
+            if sims[best] >= self.merge_threshold:
+                n = self._counts[best]
+                centroid = (self._matrix[best] * n + q) / (n + 1)
+                self._matrix[best] = centroid / (np.linalg.norm(centroid) or 1.0)
+                self._counts[best] = n + 1
+            
+            return list(self._results[best])
+    
+    def add(self, q: np.ndarray, key: tuple, results: list):
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != q.shape[0]:
+                self._reset()
+                self._matrix = q[np.newaxis, :].copy()
+            else:
+                if len(self._keys) >= self.max_size:
+                    self._matrix = self._matrix[1:]
+                    del self._keys[0], self._counts[0], self._results[0]
+                self._matrix = np.vstack([self._matrix, q])
+            self._keys.append(key)
+            self._counts.append(1)
+            self._results.append(list(results))
+
+
+_semantic_cache = _QueryCache()
+
+# Bumped on every write to the wiki collection; result caches key on it
+_collection_version = 0
+
+
+def clear_query_cache():
+    """Drop memoized query embeddings and cached search results (mainly for tests)."""
+    _embed_query_cached.cache_clear()
+    _semantic_cache.clear()
+
+
+def _collection_changed():
+    """Invalidate everything derived from the collection's current contents."""
+    global _collection_version
+    _collection_version += 1
+    _semantic_cache.clear()
+
+
+def get_collection_version() -> int:
+    """Counter that changes whenever chunks are added to or removed from the wiki."""
+    return _collection_version
+
+
+def _embed_with_jitter(text: str, model: str) -> np.ndarray:
+    """Embed a single text after a small random delay (thread pool worker)."""
+    time.sleep(random.uniform(0, EMBED_JITTER_SECONDS))
+    return get_ollama_embedding(text, model)
+
+
+def get_embeddings_batch(
+    texts: List[str],
+    model: str = DEFAULT_EMBEDDING_MODEL,
+    concurrency: Optional[int] = None,
+) -> np.ndarray:
     """
     Get embeddings for multiple texts.
     
-    Note: Ollama doesn't support true batch embedding, so this calls sequentially.
-    Future optimization: use threading for parallel requests.
+    Ollama doesn't support true batch embedding, so requests are sent
+    concurrently from a bounded thread pool (the work is I/O-bound, so
+    threads overlap the HTTP round-trips). Previously embedded texts are
+    served from the persistent cache; only the uncached ones hit Ollama.
     
     Args:
         texts: List of texts to embed
         model: Ollama model name
+        concurrency: Max in-flight requests (default: NOCTEM_EMBED_CONCURRENCY or 4)
     
     Returns:
-        List of embedding vectors
+        float32 array of shape (len(texts), dim), rows in the same order as texts
+    
+    Raises:
+        EmbeddingError: If any embedding request fails
     """
-    embeddings = []
-    for text in texts:
-        embedding = get_ollama_embedding(text, model)
-        embeddings.append(embedding)
-    return embeddings
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    
+    cache = _get_embed_cache()
+    keys = [cache.key(text) for text in texts]
+    embeddings = [cache.get(model, key) for key in keys]
+    
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        fresh = _embed_concurrently([texts[i] for i in missing], model, concurrency)
+        for i, embedding in zip(missing, fresh):
+            embeddings[i] = embedding
+        cache.put_many(model, [(keys[i], embeddings[i]) for i in missing])
+    
+    try:
+        return np.asarray(embeddings, dtype=np.float32)
+    except ValueError:
+        raise EmbeddingError("Ollama returned embeddings of inconsistent dimensions")
+
+
+def _embed_concurrently(
+    texts: List[str],
+    model: str,
+    concurrency: Optional[int] = None,
+) -> List[np.ndarray]:
+    """Call Ollama for each text from a bounded thread pool, preserving order."""
+    workers = max(1, min(concurrency or DEFAULT_EMBED_CONCURRENCY, len(texts)))
+    if workers == 1:
+        return [get_ollama_embedding(text, model) for text in texts]
+    
+    ex = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [ex.submit(_embed_with_jitter, text, model) for text in texts]
+        return [f.result() for f in futures]
+    except EmbeddingError:
+        # Don't keep hammering Ollama once one request has failed
+        ex.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        ex.shutdown(wait=True)
+
+
+async def aget_ollama_embedding(
+    client: httpx.AsyncClient,
+    text: str,
+    model: str = DEFAULT_EMBEDDING_MODEL,
+) -> np.ndarray:
+    """
+    Async version of get_ollama_embedding, using a caller-owned httpx client.
+    
+    Raises:
+        EmbeddingError: If Ollama is unavailable or request fails
+    """
+    try:
+        response = await client.post(
+            f"{OLLAMA_BASE_URL}/api/embeddings",
+            json={"model": model, "prompt": text},
+            timeout=60,
+        )
+        response.raise_for_status()
+        return _parse_embedding(response.content)
+    
+    except httpx.ConnectError:
+        raise EmbeddingError(
+            f"Cannot connect to Ollama at {OLLAMA_BASE_URL}. "
+            "Make sure Ollama is running: `ollama serve`"
+        )
+    except httpx.TimeoutException:
+        raise EmbeddingError(f"Ollama embedding request timed out for model {model}")
+    except httpx.HTTPStatusError as e:
+        raise EmbeddingError(f"Ollama API error: {e}")
+    except Exception as e:
+        raise EmbeddingError(f"Embedding failed: {e}")
+
+
+async def get_embeddings_batch_async(
+    texts: List[str],
+    model: str = DEFAULT_EMBEDDING_MODEL,
+    concurrency: int = 32,
+) -> np.ndarray:
+    """
+    Async version of get_embeddings_batch for callers already in an event loop.
+    
+    Keeps up to `concurrency` requests in flight over one pooled httpx
+    client - cheaper than threads when fanning out hundreds of requests.
+    Uses the same persistent cache as the sync path.
+    
+    Returns:
+        float32 array of shape (len(texts), dim), rows in the same order as texts
+    """
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    
+    cache = _get_embed_cache()
+    keys = [cache.key(text) for text in texts]
+    embeddings = [cache.get(model, key) for key in keys]
+    
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        sem = asyncio.Semaphore(concurrency)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        
+        async with httpx.AsyncClient(limits=limits) as client:
+            async def bounded(text: str) -> np.ndarray:
+                async with sem:
+                    return await aget_ollama_embedding(client, text, model)
+            
+            fresh = await asyncio.gather(*(bounded(texts[i]) for i in missing))
+        
+        for i, embedding in zip(missing, fresh):
+            embeddings[i] = embedding
+        cache.put_many(model, [(keys[i], embeddings[i]) for i in missing])
+    
+    try:
+        return np.asarray(embeddings, dtype=np.float32)
+    except ValueError:
+        raise EmbeddingError("Ollama returned embeddings of inconsistent dimensions")
+
+
+_ollama_check_cache: dict = {}  # model -> (monotonic timestamp, result)
 
 
 def check_ollama_available(model: str = DEFAULT_EMBEDDING_MODEL) -> Tuple[bool, str]:
     """
     Check if Ollama is available and the embedding model is installed.
     
+    A success is reused for OLLAMA_CHECK_TTL_SECONDS so callers on the
+    query path don't hit /api/tags every time; a failure only for
+    OLLAMA_CHECK_FAILURE_TTL_SECONDS.
+    
     Returns:
         Tuple of (is_available, message)
     """
+    now = time.monotonic()
+    cached = _ollama_check_cache.get(model)
+    if cached:
+        ttl = OLLAMA_CHECK_TTL_SECONDS if cached[1][0] else OLLAMA_CHECK_FAILURE_TTL_SECONDS
+        if now - cached[0] < ttl:
+            return cached[1]
+    
+    result = _probe_ollama(model)
+    _ollama_check_cache[model] = (now, result)
+    return result
+
+
+def _probe_ollama(model: str) -> Tuple[bool, str]:
+    """Ask Ollama which models are installed (uncached check)."""
     try:
         # Check if Ollama is running
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
+        response = _get_session().get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
         response.raise_for_status()
         
         # Check if the model is installed
-        data = response.json()
-        installed_models = [m.get("name", "") for m in data.get("models", [])]
+        data = _json_loads(response.content)
+        installed_names = [m.get("name", "") for m in data.get("models", [])]
         
-        # Model names might have :latest suffix
+        # Model names might have a tag suffix (e.g. ":latest"); match the exact
+        # name or name + ":" only, so "nomic-embed-text-v2" doesn't count
+        prefix = model + ":"
         model_installed = any(
-            model in m or m.startswith(f"{model}:")
-            for m in installed_models
+            name == model or name.startswith(prefix)
+            for name in installed_names
         )
         
         if not model_installed:
@@ -120,13 +608,24 @@ def check_ollama_available(model: str = DEFAULT_EMBEDDING_MODEL) -> Tuple[bool,
         return False, f"Ollama check failed: {e}"
 
 
+_client_lock = threading.Lock()
+_client = None
+_collection = None
+
+
 def get_chroma_client():
     """
     Get or create ChromaDB client with persistent storage.
     
+    The client is created once per process and reused.
+    
     Returns:
         chromadb.PersistentClient instance
     """
+    global _client
+    if _client is not None:
+        return _client
+    
     try:
         import chromadb
     except ImportError:
@@ -135,28 +634,96 @@ def get_chroma_client():
             "Install with: pip install chromadb"
         )
     
-    # Ensure directory exists
-    CHROMA_DIR.mkdir(parents=True, exist_ok=True)
+    with _client_lock:
+        if _client is None:
+            # Ensure directory exists
+            CHROMA_DIR.mkdir(parents=True, exist_ok=True)
+            _client = chromadb.PersistentClient(path=str(CHROMA_DIR))
     
-    return chromadb.PersistentClient(path=str(CHROMA_DIR))
+    return _client
 
 
 def get_wiki_collection():
     """
     Get or create the wiki collection in ChromaDB.
     
+    New collections use cosine distance. A collection created by an older
+    version (L2 distance) is used as-is with a warning; existing databases
+    must be re-indexed to migrate. The collection handle is cached;
+    clear_all_embeddings() resets it.
+    
     Returns:
         chromadb.Collection instance
     """
+    global _collection
+    if _collection is not None:
+        return _collection
+    
     client = get_chroma_client()
     
-    # Get or create collection
-    collection = client.get_or_create_collection(
-        name=WIKI_COLLECTION_NAME,
-        metadata={"description": "Noctem wiki knowledge chunks"}
-    )
+    with _client_lock:
+        if _collection is None:
+            # Don't pass metadata to an existing collection - it would
+            # relabel an L2 index as cosine without rebuilding it
+            try:
+                collection = client.get_collection(WIKI_COLLECTION_NAME)
+            except Exception:
+                collection = client.create_collection(
+                    name=WIKI_COLLECTION_NAME,
+                    metadata={
+                        "hnsw:space": "cosine",
+                        "description": "Noctem wiki knowledge chunks",
+                    },
+                )
+            
+            space = (collection.metadata or {}).get("hnsw:space", "l2")
+            if space != "cosine":
+                logger.warning(
+                    "Wiki collection uses %s distance; similarity scores are "
+                    "approximate. Re-index the wiki (clear_all_embeddings() "
+                    "and re-ingest sources) to switch to cosine.", space,
+                )
+            _collection = collection
     
-    return collection
+    return _collection
+
+
+def _batched(items: list, size: int):
+    """Yield consecutive slices of at most `size` items."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _embed_batches_into(
+    out: queue.Queue,
+    chunks: List[KnowledgeChunk],
+    model: str,
+    stop: threading.Event,
+):
+    """
+    Producer for add_chunks_to_vectorstore: embed chunks batch by batch.
+    
+    Puts (batch, embeddings) tuples on `out`, then None when finished, or
+    the raised exception if embedding fails. Gives up if `stop` is set.
+    """
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    try:
+        for batch in _batched(chunks, INGEST_BATCH_SIZE):
+            embeddings = get_embeddings_batch([chunk.content for chunk in batch], model)
+            if not put((batch, embeddings)):
+                return
+    except Exception as e:
+        put(e)
+        return
+    put(None)
 
 
 def add_chunks_to_vectorstore(
@@ -166,6 +733,10 @@ def add_chunks_to_vectorstore(
     """
     Add knowledge chunks to the vector store.
     
+    Chunks are embedded and written in batches of INGEST_BATCH_SIZE, so
+    memory stays flat for large ingests. A background thread embeds the
+    next batch while the current one is being written to ChromaDB.
+    
     Args:
         chunks: List of KnowledgeChunk objects (must have chunk_id set)
         model: Embedding model to use
@@ -178,38 +749,96 @@ def add_chunks_to_vectorstore(
     
     collection = get_wiki_collection()
     
-    # Prepare data for ChromaDB
-    ids = []
-    documents = []
-    metadatas = []
-    embeddings = []
-    
+    # Fail fast, before any embedding work is spent on an invalid ingest
     for chunk in chunks:
         if not chunk.chunk_id:
             raise ValueError(f"Chunk missing chunk_id: {chunk}")
-        
-        # Generate embedding
-        embedding = get_ollama_embedding(chunk.content, model)
-        
-        ids.append(chunk.chunk_id)
-        documents.append(chunk.content)
-        metadatas.append({
-            "source_id": chunk.source_id,
-            "page_or_section": chunk.page_or_section or "",
-            "chunk_index": chunk.chunk_index,
-            "token_count": chunk.token_count or 0,
-        })
-        embeddings.append(embedding)
-    
-    # Add to collection
-    collection.add(
-        ids=ids,
-        documents=documents,
-        metadatas=metadatas,
-        embeddings=embeddings,
+    
+    batches: queue.Queue = queue.Queue(maxsize=2)
+    stop = threading.Event()
+    producer = threading.Thread(
+        target=_embed_batches_into,
+        args=(batches, chunks, model, stop),
+        daemon=True,
     )
+    producer.start()
+    
+    added = 0
+    try:
+        while True:
+            item = batches.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            
+            batch, embeddings = item
+            
+            # Prepare data for ChromaDB (one pass, lists sized to the batch)
+            n = len(batch)
+            ids = [None] * n
+            documents = [None] * n
+            metadatas = [None] * n
+            
+            for i, chunk in enumerate(batch):
+                ids[i] = chunk.chunk_id
+                documents[i] = chunk.content
+                metadatas[i] = {
+                    "source_id": chunk.source_id,
+                    "page_or_section": chunk.page_or_section or "",
+                    "chunk_index": chunk.chunk_index,
+                    "token_count": chunk.token_count or 0,
+                }
+            
+            # Add to collection
+            collection.add(
+                ids=ids,
+                documents=documents,
+                metadatas=metadatas,
+                embeddings=embeddings,
+            )
+            added += len(batch)
+    finally:
+        stop.set()
+        producer.join()
+        _collection_changed()
+    
+    return added
+
+
+def _top_k_order(scores: np.ndarray, k: int) -> List[int]:
+    """
+    Indices of the k highest scores, best first (ties keep input order).
     
-    return len(chunks)
+    argpartition selects the candidates in O(N); only those k are sorted.
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return []
+    neg = -np.asarray(scores, dtype=np.float64)
+    if k < n:
+        # Everything strictly better than the k-th score, then the earliest ties
+        kth = neg[np.argpartition(neg, k - 1)[k - 1]]
+        better = np.flatnonzero(neg < kth)
+        ties = np.flatnonzero(neg == kth)[:k - len(better)]
+        top = np.concatenate([better, ties])
+        top.sort()
+        return top[np.argsort(neg[top], kind="stable")].tolist()
+    return np.argsort(neg, kind="stable").tolist()
+
+
+def _distances_to_similarities(distances, space: str = "l2") -> np.ndarray:
+    """
+    Convert ChromaDB distances to similarity scores (higher = more similar).
+    
+    For "cosine" and "ip" spaces ChromaDB returns 1 - similarity, so the
+    conversion is exact. For the default "l2" space there is no direct
+    mapping and 1 / (1 + distance) is used as a monotonic stand-in.
+    """
+    d = np.asarray(distances, dtype=np.float32)
+    if space in ("cosine", "ip"):
+        return 1.0 - d
+    return 1.0 / (1.0 + d)
 
 
 def search_similar(
@@ -218,6 +847,9 @@ def search_similar(
     model: str = DEFAULT_EMBEDDING_MODEL,
     source_ids: Optional[List[int]] = None,
     min_trust_level: Optional[int] = None,
+    use_semantic_cache: Optional[bool] = None,
+    overfetch: int = 3,
+    top_best: Optional[int] = None,
 ) -> List[Tuple[str, float, dict]]:
     """
     Search for chunks similar to the query.
@@ -228,26 +860,52 @@ def search_similar(
         model: Embedding model for query
         source_ids: Optional list of source IDs to filter by
         min_trust_level: Optional minimum trust level (filter in post-processing)
+        use_semantic_cache: Reuse results of a recent query within
+            SEMANTIC_CACHE_THRESHOLD cosine similarity (default:
+            SEMANTIC_CACHE_ENABLED, off unless NOCTEM_SEMANTIC_CACHE=1)
+        overfetch: On a legacy L2 collection, fetch n_results * overfetch
+            candidates and rerank them by exact cosine similarity to the
+            query before truncating. Cosine/ip collections already rank by
+            cosine (vectors are unit-length), so they skip the rerank.
+        top_best: Optionally keep only the best K hits (bounds downstream LLM context)
     
     Returns:
-        List of (chunk_id, similarity_score, metadata) tuples
+        List of (chunk_id, similarity_score, metadata) tuples, best first
     """
     collection = get_wiki_collection()
     
     # Generate query embedding
-    query_embedding = get_ollama_embedding(query, model)
+    query_embedding = _embed_query_cached(query, model)
+    
+    # Paraphrases of a recent query (same filters) reuse its results
+    overfetch = max(1, overfetch)
+    keep = top_best if top_best is not None else n_results
+    cache_key = (model, n_results, overfetch, keep, tuple(source_ids) if source_ids else None)
+    if use_semantic_cache is None:
+        use_semantic_cache = SEMANTIC_CACHE_ENABLED
+    q_norm = _QueryCache.normalize(query_embedding) if use_semantic_cache else None
+    if q_norm is not None:
+        cached = _semantic_cache.lookup(q_norm, cache_key)
+        if cached is not None:
+            return cached
     
     # Build where filter if source_ids provided
     where_filter = None
     if source_ids:
         where_filter = {"source_id": {"$in": source_ids}}
     
-    # Search
+    # Only an L2 index orders differently from cosine; there, over-fetch
+    # candidates with their vectors and refine the order below
+    space = (collection.metadata or {}).get("hnsw:space", "l2")
+    rerank = space not in ("cosine", "ip")
+    include = ["documents", "metadatas", "distances"]
+    if rerank:
+        include.append("embeddings")
     results = collection.query(
         query_embeddings=[query_embedding],
-        n_results=n_results,
+        n_results=n_results * overfetch if rerank else n_results,
         where=where_filter,
-        include=["documents", "metadatas", "distances"],
+        include=include,
     )
     
     # Process results
@@ -257,15 +915,55 @@ def search_similar(
         distances = results["distances"][0] if results.get("distances") else [0] * len(ids)
         metadatas = results["metadatas"][0] if results.get("metadatas") else [{}] * len(ids)
         
-        for chunk_id, distance, metadata in zip(ids, distances, metadatas):
-            # Convert distance to similarity (ChromaDB uses L2 distance)
-            # Lower distance = more similar, so we invert
-            similarity = 1.0 / (1.0 + distance)
-            output.append((chunk_id, similarity, metadata))
+        embeddings = results.get("embeddings") if rerank else None
+        embeddings = embeddings[0] if embeddings is not None and len(embeddings) else None
+        if embeddings is not None and len(embeddings) == len(ids):
+            # Rerank by exact cosine against the query vector
+            emb_matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+            q = np.asarray(query_embedding, dtype=np.float32)
+            norms = np.linalg.norm(emb_matrix, axis=1) * np.linalg.norm(q) + 1e-12
+            similarities = emb_matrix @ q / norms
+        else:
+            # Convert distances to similarities in one vectorized step
+            similarities = _distances_to_similarities(distances, space)
+        
+        order = _top_k_order(similarities, keep)
+        scores = similarities.tolist()
+        output = [(ids[i], scores[i], metadatas[i]) for i in order]
+    
+    if q_norm is not None:
+        _semantic_cache.add(q_norm, cache_key, output)
     
     return output
 
 
+def score_chunk_ids(
+    query: str,
+    chunk_ids: List[str],
+    model: str = DEFAULT_EMBEDDING_MODEL,
+) -> dict:
+    """
+    Exact cosine similarity of the query to specific stored chunks.
+    
+    Used for hits that came from keyword search rather than the vector index.
+    
+    Returns:
+        Dict of chunk_id -> similarity (chunks without a stored vector are omitted)
+    """
+    if not chunk_ids:
+        return {}
+    got = get_wiki_collection().get(ids=list(chunk_ids), include=["embeddings"])
+    ids = got.get("ids") if got else None
+    embeddings = got.get("embeddings") if got else None
+    if not ids or embeddings is None or len(embeddings) != len(ids):
+        return {}
+    
+    emb_matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+    q = np.asarray(_embed_query_cached(query, model), dtype=np.float32)
+    norms = np.linalg.norm(emb_matrix, axis=1) * np.linalg.norm(q) + 1e-12
+    return dict(zip(ids, (emb_matrix @ q / norms).tolist()))
+
+
 def delete_source_embeddings(source_id: int) -> int:
     """
     Delete all embeddings for a source from the vector store.
@@ -277,22 +975,19 @@ def delete_source_embeddings(source_id: int) -> int:
         Number of embeddings deleted (approximate)
     """
     collection = get_wiki_collection()
+    where = {"source_id": source_id}
     
-    # Get all chunk IDs for this source
-    results = collection.get(
-        where={"source_id": source_id},
-        include=["metadatas"],
-    )
-    
-    if not results or not results.get("ids"):
+    # Count matching chunks (IDs only - no metadata payload)
+    results = collection.get(where=where, include=[])
+    count = len(results["ids"]) if results and results.get("ids") else 0
+    if not count:
         return 0
     
-    chunk_ids = results["ids"]
-    
-    # Delete by IDs
-    collection.delete(ids=chunk_ids)
+    # Delete with the same filter - no need to round-trip the IDs
+    collection.delete(where=where)
+    _collection_changed()
     
-    return len(chunk_ids)
+    return count
 
 
 def get_collection_stats() -> dict:
@@ -327,7 +1022,9 @@ def clear_all_embeddings() -> int:
     Returns:
         Number of embeddings deleted
     """
+    global _collection
     client = get_chroma_client()
+    _collection_changed()
     
     try:
         collection = client.get_collection(WIKI_COLLECTION_NAME)
@@ -336,3 +1033,7 @@ def clear_all_embeddings() -> int:
         return count
     except Exception:
         return 0
+    finally:
+        # Force re-creation on next access
+        with _client_lock:
+            _collection = None
@@ -6,9 +6,11 @@ Supports: PDF, Markdown, TXT files.
 """
 
 import hashlib
+import mmap
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List
 import re
 
 from noctem.db import get_db
@@ -16,15 +18,40 @@ from noctem.models import Source
 from noctem.wiki import SOURCES_DIR, SUPPORTED_EXTENSIONS, TRUST_PERSONAL
 
 
+# A file modified this recently could change again within the same mtime
+# tick, so its mtime isn't recorded and the next verify hashes it
+MTIME_SETTLE_NS = 2_000_000_000
+
+HASH_READ_SIZE = 1024 * 1024
+
+
 def compute_file_hash(file_path: Path) -> str:
-    """Compute SHA-256 hash of a file."""
+    """
+    Compute SHA-256 hash of a file.
+    
+    The file is memory-mapped and hashed straight from the page cache;
+    empty files and filesystems that can't be mapped fall back to reading
+    in HASH_READ_SIZE blocks.
+    """
     sha256 = hashlib.sha256()
     with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            sha256.update(chunk)
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                sha256.update(mm)
+        except (ValueError, OSError):
+            f.seek(0)
+            for chunk in iter(lambda: f.read(HASH_READ_SIZE), b""):
+                sha256.update(chunk)
     return sha256.hexdigest()
 
 
+def _settled_mtime_ns(stat) -> Optional[int]:
+    """The file's mtime if it is old enough to trust, else None."""
+    if time.time_ns() - stat.st_mtime_ns < MTIME_SETTLE_NS:
+        return None
+    return stat.st_mtime_ns
+
+
 def detect_file_type(file_path: Path) -> Optional[str]:
     """Detect file type from extension."""
     ext = file_path.suffix.lower()
@@ -131,6 +158,20 @@ def get_source_by_id(source_id: int) -> Optional[Source]:
         return Source.from_row(row) if row else None
 
 
+def get_sources_by_ids(source_ids) -> Dict[int, Source]:
+    """Get several sources in one query, keyed by ID. Missing IDs are omitted."""
+    source_ids = list(set(source_ids))
+    if not source_ids:
+        return {}
+    placeholders = ",".join("?" * len(source_ids))
+    with get_db() as conn:
+        rows = conn.execute(
+            f"SELECT * FROM sources WHERE id IN ({placeholders})",
+            source_ids,
+        ).fetchall()
+        return {source.id: source for source in Source.from_rows(rows)}
+
+
 def list_sources(status: Optional[str] = None, trust_level: Optional[int] = None) -> List[Source]:
     """List all sources, optionally filtered by status or trust level."""
     with get_db() as conn:
@@ -148,7 +189,7 @@ def list_sources(status: Optional[str] = None, trust_level: Optional[int] = None
         query += " ORDER BY created_at DESC"
         
         rows = conn.execute(query, params).fetchall()
-        return [Source.from_row(row) for row in rows]
+        return Source.from_rows(rows)
 
 
 def create_source(
@@ -178,8 +219,8 @@ def create_source(
     if file_type is None:
         raise ValueError(f"Unsupported file type: {file_path.suffix}")
     
+    stat = file_path.stat()
     file_hash = compute_file_hash(file_path)
-    file_size = file_path.stat().st_size
     file_name = file_path.name
     
     # Try to extract title if not provided
@@ -202,14 +243,16 @@ def create_source(
             """
             INSERT INTO sources (
                 file_path, file_type, file_name, title, author,
-                file_hash, file_size_bytes, trust_level, status, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'pending', CURRENT_TIMESTAMP)
+                file_hash, file_size_bytes, file_mtime_ns, trust_level, status, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending', CURRENT_TIMESTAMP)
             """,
             (str(file_path), file_type, file_name, title, author,
-             file_hash, file_size, trust_level)
+             file_hash, stat.st_size, _settled_mtime_ns(stat), trust_level)
         )
         source_id = cursor.lastrowid
     
+    from noctem.wiki.retrieval import invalidate_wiki_caches
+    invalidate_wiki_caches()
     return get_source_by_id(source_id)
 
 
@@ -244,15 +287,23 @@ def update_source_status(
                 "UPDATE sources SET status = ? WHERE id = ?",
                 (status, source_id)
             )
+    
+    from noctem.wiki.retrieval import invalidate_wiki_caches
+    invalidate_wiki_caches()
 
 
 def verify_source(source: Source) -> bool:
     """
     Verify if a source file has changed since ingestion.
     
+    The file is only re-hashed when its size or mtime differs from the
+    recorded values (or no mtime was recorded).
+    
     Returns:
         True if file is unchanged, False if changed or missing.
     """
+    from noctem.wiki.retrieval import invalidate_wiki_caches
+    
     file_path = Path(source.file_path)
     
     if not file_path.exists():
@@ -261,24 +312,32 @@ def verify_source(source: Source) -> bool:
                 "UPDATE sources SET status = 'failed', error_message = 'File not found' WHERE id = ?",
                 (source.id,)
             )
+        invalidate_wiki_caches()
         return False
     
-    current_hash = compute_file_hash(file_path)
+    stat = file_path.stat()
+    if (source.file_mtime_ns is not None
+            and stat.st_mtime_ns == source.file_mtime_ns
+            and stat.st_size == source.file_size_bytes):
+        changed = False
+    else:
+        changed = compute_file_hash(file_path) != source.file_hash
     
     with get_db() as conn:
-        conn.execute(
-            "UPDATE sources SET last_verified = CURRENT_TIMESTAMP WHERE id = ?",
-            (source.id,)
-        )
-        
-        if current_hash != source.file_hash:
+        if changed:
             conn.execute(
-                "UPDATE sources SET status = 'changed' WHERE id = ?",
+                "UPDATE sources SET last_verified = CURRENT_TIMESTAMP, status = 'changed' WHERE id = ?",
                 (source.id,)
             )
-            return False
+        else:
+            # Content matches; remember the current mtime so the next check is stat-only
+            conn.execute(
+                "UPDATE sources SET last_verified = CURRENT_TIMESTAMP, file_mtime_ns = ? WHERE id = ?",
+                (_settled_mtime_ns(stat), source.id)
+            )
     
-    return True
+    invalidate_wiki_caches()
+    return not changed
 
 
 def discover_new_sources(directory: Path = None) -> List[Path]:
@@ -326,4 +385,7 @@ def delete_source(source_id: int) -> bool:
         
         # Delete source
         cursor = conn.execute("DELETE FROM sources WHERE id = ?", (source_id,))
-        return cursor.rowcount > 0
+    
+    from noctem.wiki.retrieval import invalidate_wiki_caches
+    invalidate_wiki_caches()
+    return cursor.rowcount > 0
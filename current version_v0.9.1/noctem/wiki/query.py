@@ -4,8 +4,12 @@ Wiki Query Module (v0.9.0)
 Query mode: Ask questions and get answers grounded in your wiki with citations.
 """
 
+import json
+import threading
+import time
 import requests
-from typing import Optional, Tuple, List
+from collections import OrderedDict
+from typing import Callable, Iterator, Optional, Tuple, List
 from dataclasses import dataclass
 
 from noctem.wiki.retrieval import (
@@ -14,13 +18,33 @@ from noctem.wiki.retrieval import (
     format_citations_footer,
     SearchResult,
 )
-from noctem.wiki.embeddings import check_ollama_available
+from noctem.wiki.embeddings import check_ollama_available, get_collection_version
+from noctem.wiki.chunking import estimate_tokens
+
+# Optional: tiktoken gives a real BPE count instead of the chars/token estimate.
+# The encoding is loaded on first use, since tiktoken may download it.
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+_encoder_lock = threading.Lock()
+_encoder = None
+_encoder_loaded = False
 
 
 # Default LLM for query answering
 DEFAULT_QUERY_MODEL = "qwen2.5:7b-instruct-q4_K_M"
 OLLAMA_BASE_URL = "http://localhost:11434"
 
+# Repeated ask()/simple_search() calls with the same arguments reuse the
+# earlier result for this long (entries also expire when the wiki changes)
+RESULT_CACHE_TTL_SECONDS = 60
+RESULT_CACHE_SIZE = 128
+
+# Context window requested from Ollama for wiki answers (its num_ctx option)
+DEFAULT_CONTEXT_WINDOW = 4096
+
 
 # System prompt for wiki Q&A
 WIKI_QA_SYSTEM_PROMPT = """You are a helpful assistant answering questions based on the user's personal knowledge base.
@@ -45,6 +69,7 @@ class WikiAnswer:
     query: str
     model_used: str
     context_tokens: int
+    error: Optional[str] = None  # Set when a streamed answer was cut off
     
     @property
     def has_answer(self) -> bool:
@@ -58,11 +83,155 @@ class WikiAnswer:
         return self.answer
 
 
+def _get_encoder():
+    """The tiktoken encoding, loaded on first call (None if unavailable)."""
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        with _encoder_lock:
+            if not _encoder_loaded:
+                if tiktoken is not None:
+                    try:
+                        _encoder = tiktoken.get_encoding("cl100k_base")
+                    except Exception:  # encoding data unavailable offline
+                        _encoder = None
+                _encoder_loaded = True
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when available, else estimate from length."""
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return estimate_tokens(text)
+
+
+@dataclass(frozen=True)
+class TokenBudget:
+    """How one ask() prompt is split across the model's context window."""
+    model_ctx: int = DEFAULT_CONTEXT_WINDOW
+    response_buffer: int = 400  # Reserved for the generated answer
+    
+    def context_tokens(self, system_prompt: str, prompt_frame: str) -> int:
+        """
+        Tokens left for retrieved sources.
+        
+        Args:
+            system_prompt: System instructions sent with the prompt
+            prompt_frame: The prompt with the question but no sources
+        
+        Returns:
+            model_ctx minus the response buffer, system prompt and frame
+        """
+        used = self.response_buffer + count_tokens(system_prompt) + count_tokens(prompt_frame)
+        return max(0, self.model_ctx - used)
+
+
+class _ResultCache:
+    """
+    LRU of recent ask()/simple_search() results with a TTL.
+    
+    Keys include the collection version, so entries from before an ingest
+    or delete are never returned; they just age out.
+    """
+    
+    def __init__(self, max_size: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()  # key -> (monotonic timestamp, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if time.monotonic() - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            self.misses += 1
+            return None
+    
+    def put(self, key: tuple, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_result_cache = _ResultCache()
+
+
+def clear_result_cache():
+    """Drop cached answers and search results (mainly for tests)."""
+    _result_cache.clear()
+
+
+def get_result_cache_stats() -> dict:
+    """Hit/miss counters and size of the ask()/simple_search() cache."""
+    return _result_cache.stats()
+
+
+_llm_session_lock = threading.Lock()
+_llm_session: Optional[requests.Session] = None
+
+
+def _get_llm_session() -> requests.Session:
+    """
+    Shared keep-alive HTTP session for answer generation.
+    
+    Separate from the embedding session: that one retries failed POSTs,
+    which would multiply a 120s generation timeout.
+    """
+    global _llm_session
+    if _llm_session is None:
+        with _llm_session_lock:
+            if _llm_session is None:
+                _llm_session = requests.Session()
+    return _llm_session
+
+
+class LLMStreamError(Exception):
+    """A streamed answer failed after part of it was already yielded."""
+
+
+def _llm_error(e: Exception) -> str:
+    """User-facing message for a failed Ollama request."""
+    if isinstance(e, requests.exceptions.ConnectionError):
+        return "Error: Cannot connect to Ollama. Make sure it's running: `ollama serve`"
+    if isinstance(e, requests.exceptions.Timeout):
+        return "Error: LLM request timed out. Try a shorter query or check Ollama."
+    return f"Error: {e}"
+
+
+def _llm_options(temperature: float, num_ctx: Optional[int]) -> dict:
+    """Ollama generation options for a wiki query."""
+    options = {"temperature": temperature}
+    if num_ctx:
+        options["num_ctx"] = num_ctx
+    return options
+
+
 def query_llm(
     prompt: str,
     system_prompt: str = WIKI_QA_SYSTEM_PROMPT,
     model: str = DEFAULT_QUERY_MODEL,
     temperature: float = 0.3,
+    num_ctx: Optional[int] = None,
 ) -> str:
     """
     Query the LLM via Ollama.
@@ -72,21 +241,20 @@ def query_llm(
         system_prompt: System instructions
         model: Ollama model name
         temperature: Response temperature (lower = more focused)
+        num_ctx: Context window to request (Ollama's default when None)
     
     Returns:
         Generated response text
     """
     try:
-        response = requests.post(
+        response = _get_llm_session().post(
             f"{OLLAMA_BASE_URL}/api/generate",
             json={
                 "model": model,
                 "prompt": prompt,
                 "system": system_prompt,
                 "stream": False,
-                "options": {
-                    "temperature": temperature,
-                },
+                "options": _llm_options(temperature, num_ctx),
             },
             timeout=120,
         )
@@ -95,12 +263,82 @@ def query_llm(
         data = response.json()
         return data.get("response", "").strip()
     
-    except requests.exceptions.ConnectionError:
-        return "Error: Cannot connect to Ollama. Make sure it's running: `ollama serve`"
-    except requests.exceptions.Timeout:
-        return "Error: LLM request timed out. Try a shorter query or check Ollama."
     except Exception as e:
-        return f"Error: {e}"
+        return _llm_error(e)
+
+
+def stream_llm(
+    prompt: str,
+    system_prompt: str = WIKI_QA_SYSTEM_PROMPT,
+    model: str = DEFAULT_QUERY_MODEL,
+    temperature: float = 0.3,
+    num_ctx: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Query the LLM via Ollama, yielding response text as it is generated.
+    
+    Ollama streams NDJSON lines from /api/generate; each carries the next
+    piece of the response, so the first words arrive after the first token
+    instead of after the whole answer.
+    
+    Args:
+        prompt: User prompt with context
+        system_prompt: System instructions
+        model: Ollama model name
+        temperature: Response temperature (lower = more focused)
+        num_ctx: Context window to request (Ollama's default when None)
+    
+    Yields:
+        Pieces of the response text, or a single error message if the
+        request fails before anything was generated
+    
+    Raises:
+        LLMStreamError: If the request fails, or the stream ends without
+            Ollama's done marker, after some text was yielded. Its message
+            is the user-facing error.
+    """
+    streamed = False
+    try:
+        with _get_llm_session().post(
+            f"{OLLAMA_BASE_URL}/api/generate",
+            json={
+                "model": model,
+                "prompt": prompt,
+                "system": system_prompt,
+                "stream": True,
+                "options": _llm_options(temperature, num_ctx),
+            },
+            stream=True,
+            timeout=120,
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                piece = chunk.get("response", "")
+                if piece:
+                    streamed = True
+                    yield piece
+                if chunk.get("done"):
+                    return
+        raise LLMStreamError("LLM stream ended before the answer was complete")
+    
+    except Exception as e:
+        if streamed:
+            raise LLMStreamError(_llm_error(e)) from e
+        yield _llm_error(e)
+
+
+def _build_prompt(context: str, question: str) -> str:
+    """Wrap retrieved sources and the question in the answer prompt."""
+    return f"""Based on the following sources from my knowledge base:
+
+{context}
+
+Question: {question}
+
+Answer (cite sources using [1], [2], etc.):"""
 
 
 def ask(
@@ -109,6 +347,8 @@ def ask(
     max_context_tokens: int = 3000,
     trust_level: Optional[int] = None,
     model: str = DEFAULT_QUERY_MODEL,
+    on_token: Optional[Callable[[str], None]] = None,
+    budget: TokenBudget = TokenBudget(),
 ) -> WikiAnswer:
     """
     Ask a question and get an answer grounded in your wiki.
@@ -119,22 +359,44 @@ def ask(
         max_context_tokens: Maximum tokens of context to include
         trust_level: Optional filter (1=personal only, 2=personal+curated, 3=all)
         model: LLM model for generating answer
+        on_token: Optional callback; when given, the answer is streamed and
+            each piece is passed to it as it arrives
+        budget: Context window split; sources are capped at whatever is left
+            after the system prompt, question and response buffer
     
     Returns:
         WikiAnswer object with answer, sources, and citations
     """
+    cache_key = ("ask", question, n_sources, max_context_tokens, trust_level, model,
+                 budget, get_collection_version())
+    cached = _result_cache.get(cache_key)
+    if cached is not None:
+        if on_token:
+            on_token(cached.answer)
+        return cached
+    
+    # Never ask for more context than fits in the model's window
+    max_tokens = min(
+        max_context_tokens,
+        budget.context_tokens(WIKI_QA_SYSTEM_PROMPT, _build_prompt("", question)),
+    )
+    
     # Get relevant context
     context, results = get_context_for_query(
         query=question,
         n_chunks=n_sources,
-        max_tokens=max_context_tokens,
+        max_tokens=max_tokens,
         trust_level=trust_level,
+        token_counter=count_tokens,  # spend the budget in the units it was computed in
     )
     
     if not context:
+        answer = ("I don't have any sources in my knowledge base yet. "
+                  "Add documents to `data/sources/` and run `noctem wiki ingest`.")
+        if on_token:
+            on_token(answer)
         return WikiAnswer(
-            answer="I don't have any sources in my knowledge base yet. "
-                   "Add documents to `data/sources/` and run `noctem wiki ingest`.",
+            answer=answer,
             sources_used=[],
             citations="",
             query=question,
@@ -142,32 +404,42 @@ def ask(
             context_tokens=0,
         )
     
-    # Estimate context tokens
-    context_tokens = len(context) // 4
-    
-    # Build prompt
-    prompt = f"""Based on the following sources from my knowledge base:
-
-{context}
-
-Question: {question}
-
-Answer (cite sources using [1], [2], etc.):"""
+    context_tokens = count_tokens(context)
+    prompt = _build_prompt(context, question)
     
     # Query LLM
-    answer = query_llm(prompt, model=model)
+    error = None
+    if on_token:
+        pieces = []
+        try:
+            for piece in stream_llm(prompt, model=model, num_ctx=budget.model_ctx):
+                pieces.append(piece)
+                on_token(piece)
+        except LLMStreamError as e:
+            # The caller has already shown the partial text; report the
+            # failure separately rather than as part of the answer
+            error = str(e)
+        answer = "".join(pieces).strip()
+    else:
+        answer = query_llm(prompt, model=model, num_ctx=budget.model_ctx)
     
     # Format citations
     citations = format_citations_footer(results)
     
-    return WikiAnswer(
+    result = WikiAnswer(
         answer=answer,
         sources_used=results,
         citations=citations,
         query=question,
         model_used=model,
         context_tokens=context_tokens,
+        error=error,
     )
+    # Only a completed answer is worth reusing: a failed request comes back
+    # as an error message, a failed stream as partial text plus an error
+    if error is None and not answer.startswith("Error:"):
+        _result_cache.put(cache_key, result)
+    return result
 
 
 def simple_search(
@@ -186,6 +458,11 @@ def simple_search(
     Returns:
         List of (content_snippet, citation_ref, similarity_score) tuples
     """
+    cache_key = ("search", query, n_results, trust_level, get_collection_version())
+    cached = _result_cache.get(cache_key)
+    if cached is not None:
+        return list(cached)
+    
     results = search(
         query=query,
         n_results=n_results,
@@ -205,6 +482,7 @@ def simple_search(
             result.similarity_score,
         ))
     
+    _result_cache.put(cache_key, tuple(output))
     return output
 
 
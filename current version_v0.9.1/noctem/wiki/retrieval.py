@@ -5,17 +5,47 @@ Semantic search over the knowledge base with trust level weighting
 and citation formatting.
 """
 
-from typing import List, Optional, Tuple
+import copy
+import re
+import sqlite3
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
 from noctem.db import get_db
 from noctem.models import Source, KnowledgeChunk
-from noctem.wiki.embeddings import search_similar, DEFAULT_EMBEDDING_MODEL
-from noctem.wiki.chunking import get_chunk_by_id
-from noctem.wiki.ingestion import get_source_by_id
+from noctem.wiki.embeddings import search_similar, score_chunk_ids, DEFAULT_EMBEDDING_MODEL
+from noctem.wiki.chunking import (
+    get_chunks_by_ids,
+    content_simhash,
+    estimate_tokens,
+    simhash_distance,
+    SIMHASH_DUPLICATE_DISTANCE,
+)
+from noctem.wiki.ingestion import get_sources_by_ids
 
 
-@dataclass
+# Reciprocal rank fusion constant: score = sum(1 / (RRF_K + rank)) over rankings
+RRF_K = 60
+
+_WORD_RE = re.compile(r"\w+")
+
+# get_wiki_stats() reuses its counts for this long; writes through the
+# ingestion/chunking helpers invalidate them immediately
+WIKI_STATS_TTL_SECONDS = 30
+
+_wiki_stats_cache: Optional[Tuple[float, dict]] = None  # (monotonic timestamp, stats)
+
+# Sources resolved by search() are reused for this long. Writes through the
+# ingestion helpers in this process clear them at once; the TTL bounds how
+# long a write from another process (e.g. a CLI ingest) goes unseen
+SOURCE_CACHE_TTL_SECONDS = 30
+SOURCE_CACHE_SIZE = 256
+
+_source_cache: Dict[int, Tuple[float, Source]] = {}  # id -> (monotonic timestamp, source)
+
+
+@dataclass(slots=True)
 class SearchResult:
     """A search result with chunk, source, and relevance info."""
     chunk: KnowledgeChunk
@@ -54,12 +84,63 @@ def format_citation(chunk: KnowledgeChunk, source: Source, index: int) -> str:
     return " ".join(parts)
 
 
+def keyword_search(
+    query: str,
+    limit: int = 10,
+    source_ids: Optional[List[int]] = None,
+) -> List[str]:
+    """
+    Rank chunks by BM25 full-text match (the keyword half of hybrid search).
+    
+    Args:
+        query: Search query text (any word may match)
+        limit: Maximum number of chunk IDs to return
+        source_ids: Optional list of specific source IDs to search
+    
+    Returns:
+        Chunk IDs, best match first (empty if nothing matches or FTS5 is unavailable)
+    """
+    words = dict.fromkeys(_WORD_RE.findall(query.lower()))
+    if not words:
+        return []
+    
+    # Quote each word so FTS5 operators in user text are taken literally
+    sql = """
+        SELECT c.chunk_id FROM knowledge_chunks_fts
+        JOIN knowledge_chunks c ON c.id = knowledge_chunks_fts.rowid
+        WHERE knowledge_chunks_fts MATCH ?
+    """
+    params: list = [" OR ".join(f'"{w}"' for w in words)]
+    if source_ids:
+        sql += f" AND c.source_id IN ({','.join('?' * len(source_ids))})"
+        params.extend(source_ids)
+    sql += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+    
+    try:
+        with get_db() as conn:
+            rows = conn.execute(sql, params).fetchall()
+    except sqlite3.OperationalError:  # no FTS5 index in this database
+        return []
+    return [row["chunk_id"] for row in rows]
+
+
+def _fuse_rankings(*rankings: List[str]) -> dict:
+    """Reciprocal rank fusion: chunk_id -> sum of 1 / (RRF_K + rank)."""
+    scores: dict = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank)
+    return scores
+
+
 def search(
     query: str,
     n_results: int = 5,
     trust_level: Optional[int] = None,
     source_ids: Optional[List[int]] = None,
     model: str = DEFAULT_EMBEDDING_MODEL,
+    hybrid: bool = True,
 ) -> List[SearchResult]:
     """
     Search the wiki knowledge base.
@@ -70,6 +151,8 @@ def search(
         trust_level: Filter to sources at or above this trust level (1=personal, 2=curated, 3=web)
         source_ids: Optional list of specific source IDs to search
         model: Embedding model to use
+        hybrid: Also rank chunks by keyword match and fuse both rankings (RRF);
+            falls back to dense-only ranking when no chunk matches a keyword
     
     Returns:
         List of SearchResult objects, sorted by weighted score (highest first)
@@ -81,17 +164,33 @@ def search(
         model=model,
         source_ids=source_ids,
     )
+    similarities = {chunk_id: similarity for chunk_id, similarity, _ in raw_results}
+    candidates = list(similarities)
+    
+    fused = None
+    if hybrid:
+        keyword_ids = keyword_search(query, limit=n_results * 2, source_ids=source_ids)
+        if keyword_ids:
+            fused = _fuse_rankings(candidates, keyword_ids)
+            missing = [chunk_id for chunk_id in keyword_ids if chunk_id not in similarities]
+            if missing:
+                similarities.update(score_chunk_ids(query, missing, model))
+            candidates = sorted(fused, key=fused.get, reverse=True)
+    
+    # Fetch all candidate chunks, then their sources, in one query each
+    chunks = get_chunks_by_ids(candidates)
+    sources = _get_sources_cached(chunk.source_id for chunk in chunks.values())
     
     results = []
     
-    for chunk_id, similarity, metadata in raw_results:
-        # Get full chunk from database
-        chunk = get_chunk_by_id(chunk_id)
+    for chunk_id in candidates:
+        similarity = similarities.get(chunk_id, 0.0)
+        
+        chunk = chunks.get(chunk_id)
         if not chunk:
             continue
         
-        # Get source
-        source = get_source_by_id(chunk.source_id)
+        source = sources.get(chunk.source_id)
         if not source:
             continue
         
@@ -115,8 +214,12 @@ def search(
             citation_ref=citation_ref,
         ))
     
-    # Sort by weighted score (trust level affects ranking)
-    results.sort(key=lambda r: r.weighted_score, reverse=True)
+    # Sort by weighted score (trust level affects ranking); with keyword hits
+    # the fused rank score takes the place of raw similarity
+    if fused:
+        results.sort(key=lambda r: fused[r.chunk.chunk_id] * r.trust_weight, reverse=True)
+    else:
+        results.sort(key=lambda r: r.weighted_score, reverse=True)
     
     # Return top n_results
     return results[:n_results]
@@ -127,6 +230,7 @@ def get_context_for_query(
     n_chunks: int = 5,
     max_tokens: int = 3000,
     trust_level: Optional[int] = None,
+    token_counter: Optional[Callable[[str], int]] = None,
 ) -> Tuple[str, List[SearchResult]]:
     """
     Get formatted context for LLM query answering.
@@ -136,6 +240,8 @@ def get_context_for_query(
         n_chunks: Maximum number of chunks to include
         max_tokens: Approximate max tokens for context
         trust_level: Optional trust level filter
+        token_counter: Measures each chunk against max_tokens; by default
+            the token count stored at ingest is used
     
     Returns:
         Tuple of (formatted_context, search_results)
@@ -152,25 +258,43 @@ def get_context_for_query(
     
     # Build context string with citations
     context_parts = []
+    used = []
+    accepted_hashes = []
     total_tokens = 0
     
-    for i, result in enumerate(results, start=1):
+    for result in results:
         chunk_text = result.chunk.content
-        chunk_tokens = result.chunk.token_count or (len(chunk_text) // 4)
+        
+        # Skip near-duplicates of a better-ranked chunk (e.g. the same
+        # passage ingested from two files); they only cost prompt tokens.
+        # Checked before the budget so a skipped duplicate can't end assembly
+        simhash = result.chunk.content_simhash
+        if simhash is None:
+            simhash = content_simhash(chunk_text)
+        if any(simhash_distance(simhash, seen) < SIMHASH_DUPLICATE_DISTANCE
+               for seen in accepted_hashes):
+            continue
+        
+        if token_counter is not None:
+            chunk_tokens = token_counter(chunk_text)
+        else:
+            chunk_tokens = result.chunk.token_count or estimate_tokens(chunk_text)
         
         if total_tokens + chunk_tokens > max_tokens:
             break
+        accepted_hashes.append(simhash)
         
         # Format with citation marker
+        used.append(result)
         context_parts.append(
-            f"[{i}] Source: {result.citation_ref}\n"
+            f"[{len(used)}] Source: {result.citation_ref}\n"
             f"{chunk_text}\n"
         )
         total_tokens += chunk_tokens
     
     context = "\n---\n".join(context_parts)
     
-    return context, results[:len(context_parts)]
+    return context, used
 
 
 def format_citations_footer(results: List[SearchResult]) -> str:
@@ -207,12 +331,11 @@ def extract_quote(text: str, max_words: int = 30) -> str:
     Returns:
         Quoted snippet, possibly truncated with "..."
     """
-    # Clean up whitespace
-    text = " ".join(text.split())
-    
-    words = text.split()
+    # Split off at most max_words words; anything left over lands in one
+    # extra element, so long chunks aren't tokenized past the cut
+    words = text.split(maxsplit=max_words)
     if len(words) <= max_words:
-        return f'"{text}"'
+        return f'"{" ".join(words)}"'
     
     truncated = " ".join(words[:max_words])
     return f'"{truncated}..."'
@@ -224,11 +347,69 @@ def get_all_indexed_sources() -> List[Source]:
         rows = conn.execute(
             "SELECT * FROM sources WHERE status = 'indexed' ORDER BY trust_level, title"
         ).fetchall()
-        return [Source.from_row(row) for row in rows]
+        return Source.from_rows(rows)
+
+
+def _get_sources_cached(source_ids) -> Dict[int, Source]:
+    """
+    Like get_sources_by_ids, but reuses sources fetched in the last
+    SOURCE_CACHE_TTL_SECONDS. Callers get copies, so changing a returned
+    source never alters the cache.
+    """
+    wanted = set(source_ids)
+    now = time.monotonic()
+    missing = []
+    for source_id in wanted:
+        entry = _source_cache.get(source_id)
+        if entry is None or now - entry[0] >= SOURCE_CACHE_TTL_SECONDS:
+            _source_cache.pop(source_id, None)
+            missing.append(source_id)
+    
+    if missing:
+        if len(_source_cache) + len(missing) > SOURCE_CACHE_SIZE:
+            _source_cache.clear()
+        for source_id, source in get_sources_by_ids(missing).items():
+            _source_cache[source_id] = (now, source)
+    
+    return {source_id: copy.copy(_source_cache[source_id][1])
+            for source_id in wanted if source_id in _source_cache}
+
+
+def invalidate_wiki_caches():
+    """Drop cached wiki statistics and sources (call after sources or chunks change)."""
+    global _wiki_stats_cache
+    _wiki_stats_cache = None
+    _source_cache.clear()
 
 
 def get_wiki_stats() -> dict:
-    """Get overall wiki statistics."""
+    """
+    Get overall wiki statistics.
+    
+    The database counts are reused for WIKI_STATS_TTL_SECONDS, or until
+    invalidate_wiki_caches() is called.
+    """
+    global _wiki_stats_cache
+    now = time.monotonic()
+    if _wiki_stats_cache and now - _wiki_stats_cache[0] < WIKI_STATS_TTL_SECONDS:
+        counts = _wiki_stats_cache[1]
+    else:
+        counts = _count_wiki_contents()
+        _wiki_stats_cache = (now, counts)
+    
+    from noctem.wiki.query import get_result_cache_stats
+    
+    # Copy so callers can't mutate the cached counts
+    return {
+        "sources_by_status": dict(counts["sources_by_status"]),
+        "total_chunks": counts["total_chunks"],
+        "sources_by_trust": dict(counts["sources_by_trust"]),
+        "query_cache": get_result_cache_stats(),
+    }
+
+
+def _count_wiki_contents() -> dict:
+    """Count sources and chunks in the database (uncached)."""
     with get_db() as conn:
         # Count sources by status
         source_stats = conn.execute(
@@ -9,7 +9,7 @@ from pathlib import Path
 
 # Import noctem modules - DB path is handled by conftest.py
 from noctem import db
-from noctem.db import get_db, init_db
+from noctem.db import get_connection, get_db, init_db
 from noctem.models import Task, Project, Goal
 from noctem.services import task_service, project_service, goal_service
 from noctem.services.briefing import generate_morning_briefing, generate_today_view, generate_week_view
@@ -57,6 +57,29 @@ class TestModels:
         )
         assert task.urgency == 0.9
     
+    def test_task_urgency_buckets(self):
+        """Urgency steps down at the 3/7/14/30-day boundaries."""
+        today = date(2026, 1, 1)
+        expected = {2: 0.7, 3: 0.7, 4: 0.5, 7: 0.5, 8: 0.3, 14: 0.3, 15: 0.1, 30: 0.1, 31: 0.0}
+        for days, urgency in expected.items():
+            task = Task(name="Test", due_date=today + timedelta(days=days))
+            assert task.urgency_at(today) == urgency, days
+    
+    def test_score_tasks_matches_priority_score(self):
+        """Vectorized scores equal the per-task property; ranking is best first."""
+        from noctem.models import score_tasks, rank_tasks
+        
+        today = date.today()
+        tasks = [
+            Task(name="later", importance=0.5, due_date=today + timedelta(days=20)),
+            Task(name="none", importance=0.2),
+            Task(name="overdue", importance=1.0, due_date=today - timedelta(days=2)),
+            Task(name="soon", importance=0.5, due_date=today + timedelta(days=3)),
+        ]
+        scores = score_tasks(tasks, today)
+        assert scores.tolist() == pytest.approx([t.priority_score for t in tasks])
+        assert [t.name for t in rank_tasks(tasks, today)] == ["overdue", "soon", "later", "none"]
+    
     def test_task_urgency_no_date(self):
         """Tasks with no due date should have urgency 0.0."""
         task = Task(id=1, name="Test", status="not_started", importance=0.5)
@@ -191,6 +214,27 @@ class TestTaskService:
         task = task_service.create_task("Due tomorrow", due_date=tomorrow)
         assert task.due_date == tomorrow
     
+    def test_timestamps_stay_iso_strings(self):
+        """Raw rows keep ISO strings; from_row does the typed conversion."""
+        tomorrow = date.today() + timedelta(days=1)
+        created = task_service.create_task("Typed", due_date=tomorrow)
+        with get_db() as conn:
+            row = conn.execute("SELECT * FROM tasks WHERE id = ?", (created.id,)).fetchone()
+        
+        assert isinstance(row["created_at"], str)
+        task = Task.from_row(row)
+        assert task.due_date == tomorrow
+    
+    def test_empty_tags_share_read_only_list(self):
+        """Rows with no tags share one read-only empty list."""
+        first = task_service.get_task(task_service.create_task("No tags A").id)
+        second = task_service.get_task(task_service.create_task("No tags B").id)
+    
+        assert first.tags == [] and isinstance(first.tags, list)
+        assert first.tags is second.tags
+        with pytest.raises(TypeError):
+            first.tags.append("x")
+    
     def test_get_task(self):
         created = task_service.create_task("Find me")
         found = task_service.get_task(created.id)
@@ -422,5 +466,51 @@ class TestIntegration:
         assert "Briefing Test Task" in briefing or "PRIORITIES" in briefing
 
 
+
+class TestDatabase:
+    """Test connection settings."""
+    
+    def test_connections_use_wal(self):
+        """Connections run in WAL mode with relaxed syncing."""
+        with get_db() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    
+    def test_connection_reused_per_thread(self):
+        """get_db() hands each thread its own long-lived connection."""
+        import threading
+        
+        with get_db() as first:
+            pass
+        with get_db() as second:
+            pass
+        assert first is second
+        
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(get_connection()))
+        thread.start()
+        thread.join()
+        assert seen[0] is not first
+    
+    def test_nested_block_rolls_back_alone(self):
+        """A failing inner get_db() block undoes only its own writes."""
+        with get_db() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS nesting_probe (x INTEGER)")
+            conn.execute("DELETE FROM nesting_probe")
+        
+        with get_db() as conn:
+            conn.execute("INSERT INTO nesting_probe VALUES (1)")
+            with pytest.raises(ValueError):
+                with get_db() as inner:
+                    inner.execute("INSERT INTO nesting_probe VALUES (2)")
+                    raise ValueError
+        
+        with get_db() as conn:
+            rows = conn.execute("SELECT x FROM nesting_probe").fetchall()
+            assert [row[0] for row in rows] == [1]
+            conn.execute("DROP TABLE nesting_probe")
+        assert not conn.in_transaction
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -118,6 +118,17 @@ class TestParseSkillYaml:
         assert metadata.requires_approval is False
         assert metadata.instructions_file == "instructions.md"
     
+    def test_parsed_dependencies_do_not_alias_cache(self, temp_skill_dir):
+        """Editing one parse's dependencies leaves later parses untouched."""
+        from noctem.skills.loader import SkillLoader
+        
+        loader = SkillLoader()
+        first = loader.parse_skill_yaml(temp_skill_dir)
+        original = list(first.dependencies)
+        first.dependencies.append("injected")
+        
+        assert loader.parse_skill_yaml(temp_skill_dir).dependencies == original
+    
     def test_parse_missing_yaml_raises(self):
         """Should raise FileNotFoundError when SKILL.yaml is missing."""
         from noctem.skills.loader import SkillLoader
@@ -156,6 +167,36 @@ class TestParseSkillYaml:
         assert metadata.triggers[0].pattern == "how do I test"
         assert metadata.triggers[1].pattern == "test help"
         assert metadata.triggers[1].confidence_threshold == 0.7
+    
+    def test_parse_reuses_cached_yaml(self, temp_skill_dir):
+        """Should not re-parse SKILL.yaml while the file is unchanged."""
+        from unittest.mock import patch
+        from noctem.skills import loader as loader_module
+        
+        loader = loader_module.SkillLoader()
+        loader.parse_skill_yaml(temp_skill_dir)
+        
+        with patch.object(loader_module.yaml, "load") as mock_load:
+            metadata = loader.parse_skill_yaml(temp_skill_dir)
+            valid, _ = loader.validate_skill(temp_skill_dir)
+        
+        mock_load.assert_not_called()
+        assert metadata.name == "test-skill"
+        assert valid
+    
+    def test_parse_picks_up_edits(self, temp_skill_dir):
+        """Should re-parse SKILL.yaml after it is rewritten."""
+        from noctem.skills.loader import SkillLoader
+        
+        loader = SkillLoader()
+        loader.parse_skill_yaml(temp_skill_dir)
+        
+        yaml_path = temp_skill_dir / "SKILL.yaml"
+        content = yaml_path.read_text(encoding='utf-8')
+        yaml_path.write_text(content.replace("A test skill", "An edited skill"), encoding='utf-8')
+        
+        metadata = loader.parse_skill_yaml(temp_skill_dir)
+        assert metadata.description == "An edited skill for unit testing"
 
 
 # =============================================================================
@@ -185,6 +226,43 @@ class TestValidateSkill:
         assert is_valid is False
         assert any("does not exist" in e for e in errors)
     
+    def test_validate_path_below_a_file(self, tmp_path):
+        """A path through a regular file is reported missing, not raised."""
+        from noctem.skills.loader import SkillLoader
+        
+        loader = SkillLoader()
+        (tmp_path / "some_file").write_text("not a directory", encoding='utf-8')
+        bad_path = tmp_path / "some_file" / "sub"
+        
+        is_valid, errors = loader.validate_skill(bad_path)
+        
+        assert is_valid is False
+        assert any("does not exist" in e for e in errors)
+        assert loader.is_valid_skill(bad_path) is False
+    
+    def test_is_valid_skill_fast_path(self, temp_skill_dir):
+        """is_valid_skill should agree with validate_skill."""
+        from noctem.skills.loader import SkillLoader
+        
+        loader = SkillLoader()
+        
+        assert loader.is_valid_skill(temp_skill_dir) is True
+        assert loader.is_valid_skill(Path("/nonexistent/path")) is False
+    
+    def test_parse_and_validate(self, temp_skill_dir):
+        """Should return metadata for a valid skill and errors otherwise."""
+        from noctem.skills.loader import SkillLoader
+        
+        loader = SkillLoader()
+        
+        metadata, errors = loader.parse_and_validate(temp_skill_dir)
+        assert errors == []
+        assert metadata.name == "test-skill"
+        
+        metadata, errors = loader.parse_and_validate(Path("/nonexistent/path"))
+        assert metadata is None
+        assert any("does not exist" in e for e in errors)
+    
     def test_validate_missing_yaml(self):
         """Should fail when SKILL.yaml is missing."""
         from noctem.skills.loader import SkillLoader
@@ -256,6 +334,16 @@ instructions_file: instructions.md
             assert is_valid is False
             assert any("semver" in e for e in errors)
     
+    def test_patterns_reject_trailing_newline_and_non_ascii_digits(self):
+        """Validation is the same whether or not re2 is installed."""
+        from noctem.skills.loader import SkillLoader
+        
+        assert SkillLoader.SEMVER_PATTERN.fullmatch("1.0.0")
+        assert not SkillLoader.SEMVER_PATTERN.fullmatch("1.0.0\n")
+        assert not SkillLoader.SEMVER_PATTERN.fullmatch("\u0661.0.0")  # Arabic-Indic one
+        assert SkillLoader.NAME_PATTERN.fullmatch("test-skill")
+        assert not SkillLoader.NAME_PATTERN.fullmatch("test-skill\n")
+    
     def test_validate_empty_triggers(self):
         """Should fail when triggers list is empty."""
         from noctem.skills.loader import SkillLoader
@@ -411,6 +499,19 @@ class TestResourceAccess:
         assert len(resources) >= 1
         assert any("template.txt" in str(r) for r in resources)
     
+    def test_list_skill_resources_recurses(self, temp_skill_dir):
+        """Should include files in nested resource directories."""
+        from noctem.skills.loader import SkillLoader
+        
+        nested = temp_skill_dir / "resources" / "examples"
+        nested.mkdir(parents=True, exist_ok=True)
+        (nested / "sample.md").write_text("sample", encoding='utf-8')
+        
+        resources = SkillLoader().list_skill_resources(temp_skill_dir)
+        
+        assert nested in resources
+        assert nested / "sample.md" in resources
+    
     def test_list_resources_empty_when_no_directory(self):
         """Should return empty list when no resources directory."""
         from noctem.skills.loader import SkillLoader
@@ -453,6 +554,73 @@ class TestSkillModels:
         assert trigger.pattern == "test pattern"
         assert trigger.confidence_threshold == 0.85
     
+    def test_skill_trigger_from_dict_is_interned(self):
+        """Identical trigger configs should share one immutable instance."""
+        import dataclasses
+        from noctem.models import SkillTrigger
+        
+        d = {"pattern": "shared pattern", "confidence_threshold": 0.9}
+        first = SkillTrigger.from_dict(d)
+        
+        assert SkillTrigger.from_dict(dict(d)) is first
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            first.pattern = "changed"
+    
+    def test_skill_trigger_match_key(self):
+        """The lowercased match key is computed once and not serialized."""
+        from noctem.models import SkillTrigger
+        
+        trigger = SkillTrigger(pattern="Plan My Week")
+        
+        assert trigger.match_key == "plan my week"
+        assert "match_key" not in trigger.to_dict()
+    
+    def test_skill_from_row_large_triggers(self):
+        """Oversized trigger columns decode without going through the cache."""
+        import json
+        from noctem import models
+        from noctem.models import Skill
+        
+        triggers = [
+            {"pattern": f"trigger phrase {i}", "confidence_threshold": 0.75}
+            for i in range(2000)
+        ]
+        raw = json.dumps(triggers)
+        assert len(raw) > models._LARGE_TRIGGERS
+        row = {
+            "id": 1, "name": "big-skill", "version": "1.0.0", "source": "user",
+            "skill_path": "/tmp/big-skill", "description": None,
+            "triggers": raw, "dependencies": None,
+            "requires_approval": 0, "enabled": 1, "last_used": None,
+            "use_count": 0, "success_count": 0, "failure_count": 0,
+            "created_at": None,
+        }
+        models._decode_triggers.cache_clear()
+        
+        skill = Skill.from_row(row)
+        
+        assert len(skill.triggers) == 2000
+        assert skill.triggers[1999].pattern == "trigger phrase 1999"
+        assert skill.triggers[0].confidence_threshold == 0.75
+        assert models._decode_triggers.cache_info().currsize == 0
+    
+    def test_from_row_positional_order_matches_fields(self):
+        """from_row passes fields positionally; each must land on its own name."""
+        import dataclasses
+        from noctem.models import Skill, SkillExecution
+        
+        for cls in (Skill, SkillExecution):
+            names = [f.name for f in dataclasses.fields(cls)]
+            row = {name: f"{name}-value" for name in names}
+            # Columns converted by from_row get values that survive conversion
+            for name in names:
+                if name in ("triggers", "dependencies") or name.endswith(("_at", "_used")):
+                    row[name] = None
+            obj = cls.from_row(row)
+            for name, value in row.items():
+                if value is not None and not isinstance(getattr(obj, name), bool):
+                    assert getattr(obj, name) == value, (cls.__name__, name)
+    
     def test_skill_metadata_to_dict(self):
         """SkillMetadata should serialize to dict correctly."""
         from noctem.models import SkillMetadata, SkillTrigger
@@ -94,6 +94,17 @@ class TestDiscoverSkills:
         names = {s.name for s in discovered}
         assert names == {"skill-a", "skill-b", "skill-c"}
     
+    def test_discover_name_clash_listed_once(self, temp_skill_dirs, sample_skill_yaml, sample_instructions):
+        """A user skill shadowing a bundled one is returned once, as the user skill."""
+        bundled, user = temp_skill_dirs
+        create_skill_dir(bundled, "test-skill", sample_skill_yaml, sample_instructions)
+        create_skill_dir(user, "test-skill", sample_skill_yaml, sample_instructions)
+        
+        registry = SkillRegistry(bundled, user)
+        discovered = registry.discover_skills()
+        
+        assert [(s.name, s.source) for s in discovered] == [("test-skill", "user")]
+    
     def test_discover_empty_directories(self, temp_skill_dirs):
         """Should handle empty skill directories."""
         bundled, user = temp_skill_dirs
@@ -120,6 +131,39 @@ class TestDiscoverSkills:
         
         assert len(discovered) == 1
         assert discovered[0].name == "valid-skill"
+    
+    def test_rediscover_updates_metadata_keeps_state(self, temp_skill_dirs, sample_skill_yaml, sample_instructions):
+        """Re-running discovery refreshes metadata but keeps enabled flag and counters."""
+        bundled, user = temp_skill_dirs
+        skill_dir = create_skill_dir(bundled, "test-skill", sample_skill_yaml, sample_instructions)
+        
+        registry = SkillRegistry(bundled, user)
+        registry.discover_skills()
+        registry.update_skill_stats("test-skill", success=True)
+        registry.disable_skill("test-skill")
+        
+        (skill_dir / "SKILL.yaml").write_text(
+            sample_skill_yaml.replace("1.0.0", "2.0.0"), encoding="utf-8"
+        )
+        discovered = registry.discover_skills()
+        
+        assert [s.name for s in discovered] == ["test-skill"]
+        assert discovered[0].version == "2.0.0"
+        assert discovered[0].enabled is False
+        assert discovered[0].use_count == 1
+        assert discovered[0].updated_at is not None
+    
+    def test_rediscover_unchanged_skill_is_not_rewritten(self, temp_skill_dirs, sample_skill_yaml, sample_instructions):
+        """An unchanged SKILL.yaml leaves the stored row as it was."""
+        bundled, user = temp_skill_dirs
+        create_skill_dir(bundled, "test-skill", sample_skill_yaml, sample_instructions)
+        
+        registry = SkillRegistry(bundled, user)
+        registry.discover_skills()
+        discovered = registry.discover_skills()
+        
+        assert [s.name for s in discovered] == ["test-skill"]
+        assert discovered[0].updated_at is None
 
 
 class TestGetSkill:
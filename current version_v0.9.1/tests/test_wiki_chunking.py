@@ -14,6 +14,9 @@ from noctem.wiki.chunking import (
     split_into_paragraphs,
     chunk_text,
     TextChunk,
+    content_simhash,
+    simhash_distance,
+    SIMHASH_DUPLICATE_DISTANCE,
     MIN_CHUNK_TOKENS,
     MAX_CHUNK_TOKENS,
 )
@@ -95,6 +98,20 @@ class TestSectionContext:
         context = find_section_context(text, 50)
         # Should find "Details"
         assert "Details" in context or "Introduction" in context
+    
+    def test_section_index_matches_find_section_context(self):
+        """The per-document index agrees with the scan at every position."""
+        from noctem.wiki.chunking import _SectionIndex
+        
+        text = (
+            "Preamble.\n\n# Intro\nText.\n\n## \n\n####### not a heading\n"
+            "#\n# odd\n\n[PAGE 3]\nPage text.\n\n### Tail line\n" + "filler " * 80 +
+            "[PAGE 4] [PAGE 5]\n## Last"
+        )
+        index = _SectionIndex(text)
+        
+        for position in range(len(text) + 1):
+            assert index.at(position) == find_section_context(text, position), position
 
 
 class TestSentenceSplitting:
@@ -295,3 +312,75 @@ class TestChunkingEdgeCases:
         
         # Should still chunk somehow
         assert len(chunks) >= 1
+
+
+class TestSimHash:
+    """Tests for near-duplicate detection."""
+    
+    PASSAGE = (
+        "Deep work is the ability to focus without distraction on a cognitively "
+        "demanding task. It is a skill that allows you to quickly master "
+        "complicated information and produce better results in less time. "
+        "Shallow work is noncognitively demanding, logistical-style tasks, often "
+        "performed while distracted, that do not create much new value."
+    )
+    
+    def test_simhash_is_stable(self):
+        assert content_simhash(self.PASSAGE) == content_simhash(self.PASSAGE)
+        assert -(1 << 63) <= content_simhash(self.PASSAGE) < (1 << 63)
+    
+    def test_near_duplicate_is_close(self):
+        # Chunk-sized text (MIN_CHUNK_TOKENS+) with a single word edited
+        words = [f"term{i}" for i in range(MIN_CHUNK_TOKENS)]
+        original = " ".join(words)
+        words[150] = "edited"
+        distance = simhash_distance(content_simhash(original), content_simhash(" ".join(words)))
+        assert distance < SIMHASH_DUPLICATE_DISTANCE
+    
+    def test_unrelated_text_is_far(self):
+        other = (
+            "The capybara is the largest living rodent, native to South America. "
+            "It lives in dense forests near bodies of water and is highly social, "
+            "often found in groups of ten to twenty individuals."
+        )
+        distance = simhash_distance(content_simhash(self.PASSAGE), content_simhash(other))
+        assert distance >= SIMHASH_DUPLICATE_DISTANCE
+
+
+class TestSaveChunks:
+    """Tests for persisting chunks."""
+    
+    def test_saved_chunks_carry_database_ids(self, tmp_path):
+        from noctem.wiki.chunking import save_chunks, get_chunks_for_source
+        from noctem.wiki.ingestion import create_source, delete_source
+        
+        path = tmp_path / "doc.txt"
+        path.write_text("placeholder")
+        source = create_source(path)
+        
+        chunks = [
+            TextChunk(content=f"Chunk number {i}", page_or_section=None, chunk_index=i,
+                      start_char=i * 20, end_char=i * 20 + 15, token_count=4)
+            for i in range(5)
+        ]
+        saved = save_chunks(source.id, chunks)
+        stored = get_chunks_for_source(source.id)
+        
+        assert [(c.id, c.chunk_id, c.content) for c in saved] == \
+            [(c.id, c.chunk_id, c.content) for c in stored]
+        assert all(c.content_simhash is not None for c in stored)
+        
+        delete_source(source.id)
+    
+    def test_source_lookup_is_ordered_by_index(self):
+        """Chunks for a source come straight off an index, with no sort step."""
+        from noctem.db import get_db
+        
+        with get_db() as conn:
+            plan = " ".join(row[3] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM knowledge_chunks "
+                "WHERE source_id = ? ORDER BY chunk_index", (1,)
+            ))
+        
+        assert "idx_chunks_source_index" in plan
+        assert "TEMP B-TREE" not in plan
@@ -5,6 +5,9 @@ Note: Many of these tests require Ollama and ChromaDB to be available.
 Tests are marked with pytest.mark.integration for those requiring external services.
 """
 
+import json
+
+import numpy as np
 import pytest
 from unittest.mock import patch, MagicMock
 
@@ -17,21 +20,35 @@ from noctem.wiki.embeddings import (
 )
 
 
+@pytest.fixture(autouse=True)
+def isolated_embed_cache(tmp_path):
+    """Point the persistent embedding cache at a per-test file."""
+    from noctem.wiki import embeddings
+    
+    cache = embeddings._EmbedCache(tmp_path / "embed_cache.sqlite")
+    embeddings.clear_query_cache()
+    embeddings._ollama_check_cache.clear()
+    with patch.object(embeddings, "_embed_cache", cache):
+        yield cache
+    embeddings.clear_query_cache()
+    cache.close()
+
+
 class TestOllamaAvailability:
     """Tests for Ollama availability checking."""
     
     def test_check_ollama_available_mocked_success(self):
         """Test successful Ollama check with mocked response."""
         mock_response = MagicMock()
-        mock_response.json.return_value = {
+        mock_response.content = json.dumps({
             "models": [
                 {"name": "nomic-embed-text:latest"},
                 {"name": "qwen2.5:7b"},
             ]
-        }
+        }).encode()
         mock_response.raise_for_status = MagicMock()
         
-        with patch("noctem.wiki.embeddings.requests.get", return_value=mock_response):
+        with patch("noctem.wiki.embeddings.requests.Session.get", return_value=mock_response):
             is_available, message = check_ollama_available()
             assert is_available is True
             assert "ready" in message.lower()
@@ -39,23 +56,72 @@ class TestOllamaAvailability:
     def test_check_ollama_available_model_not_installed(self):
         """Test when embedding model is not installed."""
         mock_response = MagicMock()
-        mock_response.json.return_value = {
+        mock_response.content = json.dumps({
             "models": [
                 {"name": "llama3:8b"},  # Different model
             ]
-        }
+        }).encode()
         mock_response.raise_for_status = MagicMock()
         
-        with patch("noctem.wiki.embeddings.requests.get", return_value=mock_response):
+        with patch("noctem.wiki.embeddings.requests.Session.get", return_value=mock_response):
             is_available, message = check_ollama_available()
             assert is_available is False
             assert "not installed" in message.lower()
     
+    def test_check_ollama_rejects_substring_match(self):
+        """A differently named model sharing a prefix doesn't count."""
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({
+            "models": [{"name": "nomic-embed-text-v2:latest"}]
+        }).encode()
+        
+        with patch("noctem.wiki.embeddings.requests.Session.get", return_value=mock_response):
+            is_available, _ = check_ollama_available()
+            assert is_available is False
+    
+    def test_check_ollama_result_is_cached(self):
+        """Repeated checks within the TTL don't re-query Ollama."""
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({
+            "models": [{"name": "nomic-embed-text:latest"}]
+        }).encode()
+        
+        with patch("noctem.wiki.embeddings.requests.Session.get",
+                   return_value=mock_response) as mock_get:
+            assert check_ollama_available()[0] is True
+            assert check_ollama_available()[0] is True
+            assert mock_get.call_count == 1
+    
+    def test_check_ollama_failure_expires_quickly(self):
+        """Once Ollama starts, a cached failure stops being reported."""
+        import requests
+        from noctem.wiki import embeddings
+        
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({
+            "models": [{"name": "nomic-embed-text:latest"}]
+        }).encode()
+        
+        with patch("noctem.wiki.embeddings.requests.Session.get",
+                   side_effect=[requests.exceptions.ConnectionError(), mock_response]) as mock_get:
+            assert check_ollama_available()[0] is False
+            assert check_ollama_available()[0] is False  # within the failure TTL
+            assert mock_get.call_count == 1
+            
+            # Age the failure past its TTL but well inside the success TTL
+            checked_at, result = embeddings._ollama_check_cache[embeddings.DEFAULT_EMBEDDING_MODEL]
+            embeddings._ollama_check_cache[embeddings.DEFAULT_EMBEDDING_MODEL] = (
+                checked_at - embeddings.OLLAMA_CHECK_FAILURE_TTL_SECONDS, result
+            )
+            assert check_ollama_available()[0] is True
+        
+        assert embeddings.OLLAMA_CHECK_FAILURE_TTL_SECONDS < embeddings.OLLAMA_CHECK_TTL_SECONDS
+    
     def test_check_ollama_not_running(self):
         """Test when Ollama is not running."""
         import requests
         
-        with patch("noctem.wiki.embeddings.requests.get", 
+        with patch("noctem.wiki.embeddings.requests.Session.get", 
                    side_effect=requests.exceptions.ConnectionError()):
             is_available, message = check_ollama_available()
             assert is_available is False
@@ -70,19 +136,23 @@ class TestEmbeddingGeneration:
         mock_embedding = [0.1, 0.2, 0.3, 0.4, 0.5] * 100  # 500-dim fake embedding
         
         mock_response = MagicMock()
-        mock_response.json.return_value = {"embedding": mock_embedding}
+        mock_response.content = json.dumps({"embedding": mock_embedding}).encode()
         mock_response.raise_for_status = MagicMock()
         
-        with patch("noctem.wiki.embeddings.requests.post", return_value=mock_response):
+        with patch("noctem.wiki.embeddings.requests.Session.post", return_value=mock_response):
             result = get_ollama_embedding("test text")
-            assert result == mock_embedding
-            assert len(result) == 500
+            assert isinstance(result, np.ndarray)
+            assert result.dtype == np.float32
+            assert result.shape == (500,)
+            expected = np.asarray(mock_embedding) / np.linalg.norm(mock_embedding)
+            assert np.allclose(result, expected)
+            assert np.isclose(np.linalg.norm(result), 1.0)
     
     def test_get_embedding_connection_error(self):
         """Test embedding when Ollama is unavailable."""
         import requests
         
-        with patch("noctem.wiki.embeddings.requests.post",
+        with patch("noctem.wiki.embeddings.requests.Session.post",
                    side_effect=requests.exceptions.ConnectionError()):
             with pytest.raises(EmbeddingError) as exc_info:
                 get_ollama_embedding("test text")
@@ -92,13 +162,303 @@ class TestEmbeddingGeneration:
         """Test embedding timeout handling."""
         import requests
         
-        with patch("noctem.wiki.embeddings.requests.post",
+        with patch("noctem.wiki.embeddings.requests.Session.post",
                    side_effect=requests.exceptions.Timeout()):
             with pytest.raises(EmbeddingError) as exc_info:
                 get_ollama_embedding("test text")
             assert "timed out" in str(exc_info.value).lower()
 
 
+class TestDistanceConversion:
+    """Tests for converting ChromaDB distances to similarities."""
+    
+    def test_cosine_distance(self):
+        from noctem.wiki.embeddings import _distances_to_similarities
+        sims = _distances_to_similarities([0.0, 0.25, 1.0], "cosine")
+        assert np.allclose(sims, [1.0, 0.75, 0.0])
+    
+    def test_l2_fallback(self):
+        from noctem.wiki.embeddings import _distances_to_similarities
+        sims = _distances_to_similarities([0.0, 1.0, 3.0], "l2")
+        assert np.allclose(sims, [1.0, 0.5, 0.25])
+
+
+class TestSearchRerank:
+    """Tests for over-fetch and exact-cosine rerank in search_similar."""
+    
+    def _collection(self, space="l2"):
+        collection = MagicMock()
+        collection.metadata = {"hnsw:space": space}
+        collection.query.return_value = {
+            "ids": [["a", "b", "c"]],
+            "distances": [[0.1, 0.2, 0.3]],
+            "metadatas": [[{"n": 1}, {"n": 2}, {"n": 3}]],
+            "embeddings": [[[0.0, 1.0], [1.0, 0.0], [0.6, 0.8]]],
+        }
+        return collection
+    
+    def test_overfetches_and_reranks_l2(self):
+        """A legacy L2 collection is over-fetched and reordered by exact cosine."""
+        from noctem.wiki import embeddings
+        
+        collection = self._collection()
+        with patch.object(embeddings, "get_wiki_collection", return_value=collection), \
+             patch.object(embeddings, "get_ollama_embedding", return_value=[1.0, 0.0]):
+            results = embeddings.search_similar("q", n_results=2, use_semantic_cache=False)
+        
+        assert collection.query.call_args.kwargs["n_results"] == 6
+        assert "embeddings" in collection.query.call_args.kwargs["include"]
+        assert [r[0] for r in results] == ["b", "c"]
+        assert results[0][1] == pytest.approx(1.0)
+    
+    def test_cosine_collection_skips_rerank(self):
+        """Cosine distances already give the exact order; no extra payload is fetched."""
+        from noctem.wiki import embeddings
+        
+        collection = self._collection("cosine")
+        with patch.object(embeddings, "get_wiki_collection", return_value=collection), \
+             patch.object(embeddings, "get_ollama_embedding", return_value=[1.0, 0.0]):
+            results = embeddings.search_similar("q", n_results=2, use_semantic_cache=False)
+        
+        assert collection.query.call_args.kwargs["n_results"] == 2
+        assert "embeddings" not in collection.query.call_args.kwargs["include"]
+        assert [r[0] for r in results] == ["a", "b"]
+        assert results[0][1] == pytest.approx(0.9)
+    
+    def test_top_best_truncates(self):
+        from noctem.wiki import embeddings
+        
+        with patch.object(embeddings, "get_wiki_collection", return_value=self._collection()), \
+             patch.object(embeddings, "get_ollama_embedding", return_value=[1.0, 0.0]):
+            results = embeddings.search_similar(
+                "q", n_results=3, top_best=1, use_semantic_cache=False
+            )
+        
+        assert [r[0] for r in results] == ["b"]
+    
+    def test_top_k_order_matches_stable_sort(self):
+        from noctem.wiki.embeddings import _top_k_order
+        
+        scores = np.array([0.5, 0.9, 0.5, 0.1, 0.9, 0.5], dtype=np.float32)
+        
+        assert _top_k_order(scores, 3) == [1, 4, 0]
+        assert _top_k_order(scores, 4) == [1, 4, 0, 2]
+        assert _top_k_order(scores, 10) == [1, 4, 0, 2, 5, 3]
+        assert _top_k_order(scores, 0) == []
+
+
+class TestHTTPSession:
+    """Tests for the shared Ollama HTTP session."""
+    
+    def test_session_is_shared(self):
+        from noctem.wiki.embeddings import _get_session
+        assert _get_session() is _get_session()
+    
+    def test_session_pools_connections(self):
+        from noctem.wiki.embeddings import _get_session
+        adapter = _get_session().get_adapter(OLLAMA_BASE_URL)
+        assert adapter._pool_maxsize >= 8
+
+
+class TestEmbeddingBatch:
+    """Tests for concurrent batch embedding."""
+    
+    def test_batch_preserves_order(self):
+        """Results come back in input order regardless of completion order."""
+        from noctem.wiki.embeddings import get_embeddings_batch
+        
+        def fake_embedding(text, model=None):
+            return [float(len(text))]
+        
+        texts = ["a", "bbb", "cc", "dddd", "e"]
+        with patch("noctem.wiki.embeddings.get_ollama_embedding", side_effect=fake_embedding):
+            result = get_embeddings_batch(texts, concurrency=4)
+        
+        assert result.dtype == np.float32
+        assert result.tolist() == [[1.0], [3.0], [2.0], [4.0], [1.0]]
+    
+    def test_batch_empty(self):
+        from noctem.wiki.embeddings import get_embeddings_batch
+        assert len(get_embeddings_batch([])) == 0
+    
+    def test_batch_propagates_embedding_error(self):
+        """An EmbeddingError from any worker is raised to the caller."""
+        from noctem.wiki.embeddings import get_embeddings_batch
+        
+        def fake_embedding(text, model=None):
+            if text == "bad":
+                raise EmbeddingError("boom")
+            return [0.0]
+        
+        with patch("noctem.wiki.embeddings.get_ollama_embedding", side_effect=fake_embedding):
+            with pytest.raises(EmbeddingError):
+                get_embeddings_batch(["ok", "bad", "ok"], concurrency=2)
+
+
+class TestAsyncEmbedding:
+    """Tests for the async (httpx) embedding path."""
+    
+    def test_aget_embedding(self):
+        import asyncio
+        import httpx
+        from noctem.wiki.embeddings import aget_ollama_embedding
+        
+        def handler(request):
+            return httpx.Response(200, json={"embedding": [3.0, 4.0]})
+        
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await aget_ollama_embedding(client, "text")
+        
+        result = asyncio.run(run())
+        assert np.allclose(result, [0.6, 0.8])
+    
+    def test_aget_embedding_http_error(self):
+        import asyncio
+        import httpx
+        from noctem.wiki.embeddings import aget_ollama_embedding
+        
+        def handler(request):
+            return httpx.Response(500)
+        
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await aget_ollama_embedding(client, "text")
+        
+        with pytest.raises(EmbeddingError):
+            asyncio.run(run())
+    
+    def test_batch_async_preserves_order(self):
+        import asyncio
+        from noctem.wiki.embeddings import get_embeddings_batch_async
+        
+        async def fake_embedding(client, text, model=None):
+            await asyncio.sleep(0.01 * (5 - len(text)))
+            return np.asarray([float(len(text))], dtype=np.float32)
+        
+        with patch("noctem.wiki.embeddings.aget_ollama_embedding", side_effect=fake_embedding):
+            result = asyncio.run(get_embeddings_batch_async(["a", "bbb", "cc"], concurrency=2))
+        
+        assert result.tolist() == [[1.0], [3.0], [2.0]]
+
+
+class TestEmbedCache:
+    """Tests for the persistent embedding cache."""
+    
+    def test_roundtrip_float32(self, isolated_embed_cache):
+        key = isolated_embed_cache.key("hello")
+        isolated_embed_cache.put_many("m", [(key, [0.5, 0.25, -1.0])])
+        assert isolated_embed_cache.get("m", key).tolist() == [0.5, 0.25, -1.0]
+        assert isolated_embed_cache.get("other-model", key) is None
+    
+    def test_whitespace_and_case_edits_reuse_embedding(self, isolated_embed_cache):
+        cache = isolated_embed_cache
+        cache.put_many("m", [(cache.key("Deep work  needs\nfocus."), [1.0, 0.0])])
+        assert cache.get("m", cache.key("deep work needs focus.")).tolist() == [1.0, 0.0]
+        assert cache.get("m", cache.key("deep work needs rest.")) is None
+    
+    def test_strict_mode_requires_exact_text(self, tmp_path):
+        from noctem.wiki.embeddings import _EmbedCache
+        
+        cache = _EmbedCache(tmp_path / "strict.sqlite", strict=True)
+        cache.put_many("m", [(cache.key("Deep work"), [1.0, 0.0])])
+        assert cache.get("m", cache.key("deep work")) is None
+        assert cache.get("m", cache.key("Deep work")).tolist() == [1.0, 0.0]
+        cache.close()
+    
+    def test_batch_only_embeds_uncached(self):
+        from noctem.wiki.embeddings import get_embeddings_batch
+        
+        calls = []
+        
+        def fake_embedding(text, model=None):
+            calls.append(text)
+            return [float(len(text))]
+        
+        with patch("noctem.wiki.embeddings.get_ollama_embedding", side_effect=fake_embedding):
+            get_embeddings_batch(["one", "two"])
+            calls.clear()
+            result = get_embeddings_batch(["one", "three", "two"])
+        
+        assert calls == ["three"]
+        assert result.tolist() == [[3.0], [5.0], [3.0]]
+
+
+class TestQueryCache:
+    """Tests for the in-process query embedding cache."""
+    
+    def test_repeated_query_embeds_once(self):
+        from noctem.wiki.embeddings import _embed_query_cached
+        
+        with patch("noctem.wiki.embeddings.get_ollama_embedding",
+                   return_value=[0.1, 0.2]) as mock_embed:
+            first = _embed_query_cached("what is deep work?", DEFAULT_EMBEDDING_MODEL)
+            second = _embed_query_cached("what is deep work?", DEFAULT_EMBEDDING_MODEL)
+        
+        assert first is second
+        assert np.allclose(first, [0.1, 0.2])
+        assert mock_embed.call_count == 1
+
+
+class TestSemanticQueryCache:
+    """Tests for the semantic (paraphrase) query result cache."""
+    
+    def _cache(self):
+        from noctem.wiki.embeddings import _QueryCache
+        return _QueryCache(max_size=2, threshold=0.86, merge_threshold=0.95)
+    
+    def test_similar_query_hits(self):
+        from noctem.wiki.embeddings import _QueryCache
+        cache = self._cache()
+        key = ("m", 5, None)
+        cache.add(_QueryCache.normalize([1.0, 0.0, 0.0]), key, [("a", 0.9, {})])
+        
+        hit = cache.lookup(_QueryCache.normalize([1.0, 0.1, 0.0]), key)
+        assert hit == [("a", 0.9, {})]
+        
+        assert cache.lookup(_QueryCache.normalize([0.0, 1.0, 0.0]), key) is None
+    
+    def test_different_filters_miss(self):
+        from noctem.wiki.embeddings import _QueryCache
+        cache = self._cache()
+        q = _QueryCache.normalize([1.0, 0.0])
+        cache.add(q, ("m", 5, None), [("a", 0.9, {})])
+        assert cache.lookup(q, ("m", 5, (1, 2))) is None
+        assert cache.lookup(q, ("m", 10, None)) is None
+    
+    def test_fifo_eviction(self):
+        from noctem.wiki.embeddings import _QueryCache
+        cache = self._cache()
+        key = ("m", 5, None)
+        cache.add(_QueryCache.normalize([1.0, 0.0, 0.0]), key, ["x"])
+        cache.add(_QueryCache.normalize([0.0, 1.0, 0.0]), key, ["y"])
+        cache.add(_QueryCache.normalize([0.0, 0.0, 1.0]), key, ["z"])
+        assert len(cache) == 2
+        assert cache.lookup(_QueryCache.normalize([1.0, 0.0, 0.0]), key) is None
+    
+    def test_zero_vector_not_cached(self):
+        from noctem.wiki.embeddings import _QueryCache
+        assert _QueryCache.normalize([0.0, 0.0]) is None
+    
+    def test_search_skips_cache_unless_enabled(self):
+        """A near-identical query only reuses results when the cache is opted into."""
+        from noctem.wiki import embeddings
+        
+        collection = MagicMock()
+        collection.query.return_value = {"ids": [[]]}
+        embeddings.clear_query_cache()
+        with patch.object(embeddings, "get_wiki_collection", return_value=collection), \
+             patch.object(embeddings, "get_ollama_embedding", return_value=[1.0, 0.0]):
+            embeddings.search_similar("how to add tags")
+            embeddings.search_similar("how to add tags?")
+            assert collection.query.call_count == 2
+            
+            embeddings.search_similar("how to add tags", use_semantic_cache=True)
+            embeddings.search_similar("how to delete tags", use_semantic_cache=True)
+            assert collection.query.call_count == 3
+        embeddings.clear_query_cache()
+
+
 class TestChromaDBIntegration:
     """Tests for ChromaDB integration.
     
@@ -120,6 +480,28 @@ class TestChromaDBIntegration:
         assert collection is not None
         assert collection.name == "noctem_wiki"
     
+    def test_client_and_collection_are_reused(self):
+        """Repeated calls return the same cached client and collection."""
+        from noctem.wiki.embeddings import get_chroma_client, get_wiki_collection
+        
+        assert get_chroma_client() is get_chroma_client()
+        assert get_wiki_collection() is get_wiki_collection()
+    
+    def test_new_collection_uses_cosine(self):
+        """A freshly created wiki collection is configured for cosine distance."""
+        from noctem.wiki import embeddings
+        
+        client = MagicMock()
+        client.get_collection.side_effect = ValueError("does not exist")
+        client.create_collection.return_value.metadata = {"hnsw:space": "cosine"}
+        
+        with patch.object(embeddings, "_collection", None), \
+             patch.object(embeddings, "get_chroma_client", return_value=client):
+            embeddings.get_wiki_collection()
+        
+        metadata = client.create_collection.call_args.kwargs["metadata"]
+        assert metadata["hnsw:space"] == "cosine"
+    
     def test_collection_stats(self):
         """Test collection statistics."""
         from noctem.wiki.embeddings import get_collection_stats
@@ -199,6 +581,53 @@ class TestVectorStoreOperations:
             assert deleted == 2
 
 
+class TestBatchedIngest:
+    """Tests for batched, pipelined writes in add_chunks_to_vectorstore."""
+    
+    def _chunks(self, n):
+        from noctem.models import KnowledgeChunk
+        return [
+            KnowledgeChunk(source_id=1, chunk_id=f"c{i}", content=f"text {i}", chunk_index=i)
+            for i in range(n)
+        ]
+    
+    def test_writes_in_batches(self):
+        from noctem.wiki import embeddings
+        
+        collection = MagicMock()
+        with patch.object(embeddings, "INGEST_BATCH_SIZE", 2), \
+             patch.object(embeddings, "get_wiki_collection", return_value=collection), \
+             patch.object(embeddings, "get_ollama_embedding", return_value=[0.1, 0.2]):
+            count = embeddings.add_chunks_to_vectorstore(self._chunks(5))
+        
+        assert count == 5
+        batch_ids = [call.kwargs["ids"] for call in collection.add.call_args_list]
+        assert batch_ids == [["c0", "c1"], ["c2", "c3"], ["c4"]]
+    
+    def test_missing_chunk_id_fails_before_embedding(self):
+        from noctem.wiki import embeddings
+        
+        chunks = self._chunks(3)
+        chunks[2].chunk_id = None
+        with patch.object(embeddings, "get_wiki_collection", return_value=MagicMock()), \
+             patch.object(embeddings, "get_ollama_embedding") as mock_embed:
+            with pytest.raises(ValueError):
+                embeddings.add_chunks_to_vectorstore(chunks)
+        
+        mock_embed.assert_not_called()
+    
+    def test_embedding_failure_raises(self):
+        from noctem.wiki import embeddings
+        
+        collection = MagicMock()
+        with patch.object(embeddings, "get_wiki_collection", return_value=collection), \
+             patch.object(embeddings, "get_ollama_embedding", side_effect=EmbeddingError("down")):
+            with pytest.raises(EmbeddingError):
+                embeddings.add_chunks_to_vectorstore(self._chunks(3))
+        
+        collection.add.assert_not_called()
+
+
 class TestEmbeddingError:
     """Tests for EmbeddingError exception."""
     
@@ -2,9 +2,11 @@
 Tests for wiki ingestion module (v0.9.0).
 """
 
+import os
 import pytest
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
 from noctem.wiki.ingestion import (
     compute_file_hash,
@@ -15,6 +17,7 @@ from noctem.wiki.ingestion import (
     create_source,
     get_source_by_id,
     get_source_by_path,
+    get_sources_by_ids,
     list_sources,
     update_source_status,
     verify_source,
@@ -81,6 +84,19 @@ class TestFileHash:
         
         path1.unlink()
         path2.unlink()
+    
+    def test_hash_matches_hashlib(self, tmp_path):
+        """Mapped and fallback paths both give the plain SHA-256 digest."""
+        import hashlib
+        
+        data = b"wiki source bytes\n" * 100_000
+        path = tmp_path / "big.txt"
+        path.write_bytes(data)
+        empty = tmp_path / "empty.txt"
+        empty.write_bytes(b"")
+        
+        assert compute_file_hash(path) == hashlib.sha256(data).hexdigest()
+        assert compute_file_hash(empty) == hashlib.sha256(b"").hexdigest()
 
 
 class TestTextExtraction:
@@ -206,6 +222,29 @@ class TestSourceCRUD:
         delete_source(source.id)
         path.unlink()
     
+    def test_get_sources_by_ids(self):
+        paths = []
+        sources = []
+        
+        for i in range(2):
+            with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
+                f.write(f"Bulk {i}")
+                f.flush()
+                paths.append(Path(f.name))
+            sources.append(create_source(paths[-1]))
+        
+        ids = [s.id for s in sources]
+        found = get_sources_by_ids(ids + ids + [999999])
+        
+        assert set(found) == set(ids)
+        assert found[ids[0]].file_path == sources[0].file_path
+        assert get_sources_by_ids([]) == {}
+        
+        for source in sources:
+            delete_source(source.id)
+        for path in paths:
+            path.unlink()
+    
     def test_list_sources_all(self):
         # Create some sources
         paths = []
@@ -367,6 +406,43 @@ class TestSourceVerification:
         assert "not found" in updated.error_message.lower()
         
         delete_source(source.id)
+    
+    def test_verify_skips_hash_for_untouched_file(self, tmp_path):
+        path = tmp_path / "settled.txt"
+        path.write_text("Settled content")
+        os.utime(path, ns=(1_600_000_000_000_000_000,) * 2)
+        
+        source = create_source(path)
+        assert source.file_mtime_ns == 1_600_000_000_000_000_000
+        
+        with patch("noctem.wiki.ingestion.compute_file_hash") as compute:
+            assert verify_source(source) is True
+            compute.assert_not_called()
+        
+        delete_source(source.id)
+    
+    def test_verify_rehashes_touched_file(self, tmp_path):
+        path = tmp_path / "touched.txt"
+        path.write_text("Same content")
+        os.utime(path, ns=(1_600_000_000_000_000_000,) * 2)
+        source = create_source(path)
+        
+        # Newer mtime but identical bytes: hashed, still unchanged, mtime refreshed
+        os.utime(path, ns=(1_700_000_000_000_000_000,) * 2)
+        assert verify_source(source) is True
+        assert get_source_by_id(source.id).file_mtime_ns == 1_700_000_000_000_000_000
+        
+        delete_source(source.id)
+    
+    def test_recently_modified_file_mtime_not_recorded(self, tmp_path):
+        path = tmp_path / "fresh.txt"
+        path.write_text("Just written")
+        
+        source = create_source(path)
+        
+        assert source.file_mtime_ns is None
+        
+        delete_source(source.id)
 
 
 class TestSourceDiscovery:
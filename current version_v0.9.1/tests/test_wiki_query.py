@@ -8,11 +8,26 @@ from unittest.mock import patch, MagicMock
 from noctem.wiki.query import (
     WikiAnswer,
     query_llm,
+    stream_llm,
+    LLMStreamError,
+    ask,
+    simple_search,
+    clear_result_cache,
+    get_result_cache_stats,
+    TokenBudget,
     check_wiki_ready,
     WIKI_QA_SYSTEM_PROMPT,
 )
 
 
+@pytest.fixture(autouse=True)
+def fresh_result_cache():
+    """Each test starts without cached answers."""
+    clear_result_cache()
+    yield
+    clear_result_cache()
+
+
 class TestWikiAnswer:
     """Tests for WikiAnswer dataclass."""
     
@@ -107,15 +122,23 @@ class TestQueryLLM:
         }
         mock_response.raise_for_status = MagicMock()
         
-        with patch("noctem.wiki.query.requests.post", return_value=mock_response):
+        with patch("noctem.wiki.query.requests.Session.post", return_value=mock_response):
             result = query_llm("Test prompt")
             assert result == "This is the LLM's answer."
     
+    def test_query_llm_reuses_session(self):
+        """Generation requests share one keep-alive session."""
+        from noctem.wiki.query import _get_llm_session
+        from noctem.wiki.embeddings import _get_session
+        
+        assert _get_llm_session() is _get_llm_session()
+        assert _get_llm_session() is not _get_session()
+    
     def test_query_llm_connection_error(self):
         """Test LLM query when Ollama is unavailable."""
         import requests
         
-        with patch("noctem.wiki.query.requests.post",
+        with patch("noctem.wiki.query.requests.Session.post",
                    side_effect=requests.exceptions.ConnectionError()):
             result = query_llm("Test prompt")
             assert "error" in result.lower()
@@ -125,13 +148,221 @@ class TestQueryLLM:
         """Test LLM query timeout."""
         import requests
         
-        with patch("noctem.wiki.query.requests.post",
+        with patch("noctem.wiki.query.requests.Session.post",
                    side_effect=requests.exceptions.Timeout()):
             result = query_llm("Test prompt")
             assert "error" in result.lower()
             assert "timed out" in result.lower()
 
 
+class TestStreamLLM:
+    """Tests for streaming LLM queries."""
+    
+    def _streaming_response(self, lines):
+        mock_response = MagicMock()
+        mock_response.__enter__.return_value = mock_response
+        mock_response.iter_lines.return_value = iter(lines)
+        return mock_response
+    
+    def test_stream_llm_yields_pieces(self):
+        """Each NDJSON line's response text is yielded as it arrives."""
+        lines = [
+            b'{"response": "The ", "done": false}',
+            b'',
+            b'{"response": "answer.", "done": false}',
+            b'{"response": "", "done": true}',
+        ]
+        with patch("noctem.wiki.query.requests.Session.post",
+                   return_value=self._streaming_response(lines)) as mock_post:
+            pieces = list(stream_llm("Test prompt"))
+        
+        assert pieces == ["The ", "answer."]
+        assert mock_post.call_args.kwargs["stream"] is True
+        assert mock_post.call_args.kwargs["json"]["stream"] is True
+    
+    def test_stream_llm_connection_error(self):
+        """Connection failures are reported as a single error piece."""
+        import requests
+        
+        with patch("noctem.wiki.query.requests.Session.post",
+                   side_effect=requests.exceptions.ConnectionError()):
+            pieces = list(stream_llm("Test prompt"))
+        
+        assert len(pieces) == 1
+        assert "connect" in pieces[0].lower()
+    
+    def test_ask_streams_to_callback(self):
+        """ask(on_token=...) passes pieces through and returns the joined answer."""
+        lines = [b'{"response": "Streamed [1]"}', b'{"response": " answer.", "done": true}']
+        received = []
+        with patch("noctem.wiki.query.get_context_for_query", return_value=("[1] ctx", [])), \
+             patch("noctem.wiki.query.requests.Session.post",
+                   return_value=self._streaming_response(lines)):
+            answer = ask("q", on_token=received.append)
+        
+        assert received == ["Streamed [1]", " answer."]
+        assert answer.answer == "Streamed [1] answer."
+        assert answer.error is None
+    
+    def test_stream_llm_raises_after_partial_output(self):
+        """A failure mid-stream is raised, not yielded as answer text."""
+        import requests
+        
+        def lines():
+            yield b'{"response": "Partial answer"}'
+            raise requests.exceptions.ConnectionError()
+        
+        with patch("noctem.wiki.query.requests.Session.post",
+                   return_value=self._streaming_response(lines())):
+            stream = stream_llm("Test prompt")
+            assert next(stream) == "Partial answer"
+            with pytest.raises(LLMStreamError, match="connect"):
+                next(stream)
+    
+    def test_stream_llm_raises_without_done(self):
+        """A stream that stops before Ollama's done marker is incomplete."""
+        lines = [b'{"response": "Cut", "done": false}']
+        with patch("noctem.wiki.query.requests.Session.post",
+                   return_value=self._streaming_response(lines)):
+            with pytest.raises(LLMStreamError):
+                list(stream_llm("Test prompt"))
+    
+    def test_ask_reports_mid_stream_failure(self):
+        """The partial answer and the error come back separately."""
+        import requests
+        
+        def lines():
+            yield b'{"response": "Partial answer"}'
+            raise requests.exceptions.Timeout()
+        
+        received = []
+        with patch("noctem.wiki.query.get_context_for_query", return_value=("[1] ctx", [])), \
+             patch("noctem.wiki.query.requests.Session.post",
+                   return_value=self._streaming_response(lines())):
+            answer = ask("q", on_token=received.append)
+        
+        assert received == ["Partial answer"]
+        assert answer.answer == "Partial answer"
+        assert "timed out" in answer.error
+
+
+class TestResultCache:
+    """Tests for the ask()/simple_search() result cache."""
+    
+    def test_repeated_ask_reuses_answer(self):
+        """An identical question is answered once while the wiki is unchanged."""
+        with patch("noctem.wiki.query.get_context_for_query", return_value=("[1] ctx", [])), \
+             patch("noctem.wiki.query.query_llm", return_value="Cached [1].") as mock_llm:
+            first = ask("same question")
+            second = ask("same question")
+        
+        assert second is first
+        assert mock_llm.call_count == 1
+        assert get_result_cache_stats()["hits"] == 1
+    
+    def test_collection_change_invalidates(self):
+        """Writes to the wiki collection make earlier answers unreachable."""
+        from noctem.wiki import embeddings
+        
+        with patch("noctem.wiki.query.get_context_for_query", return_value=("[1] ctx", [])), \
+             patch("noctem.wiki.query.query_llm", return_value="Answer [1].") as mock_llm:
+            ask("same question")
+            embeddings._collection_changed()
+            ask("same question")
+        
+        assert mock_llm.call_count == 2
+    
+    def test_errors_are_not_cached(self):
+        """A failed LLM call is retried on the next identical question."""
+        with patch("noctem.wiki.query.get_context_for_query", return_value=("[1] ctx", [])), \
+             patch("noctem.wiki.query.query_llm", return_value="Error: LLM request timed out.") as mock_llm:
+            ask("same question")
+            ask("same question")
+        
+        assert mock_llm.call_count == 2
+    
+    def test_interrupted_stream_is_not_cached(self):
+        """A partial streamed answer is regenerated, streaming or not."""
+        from noctem.wiki.query import LLMStreamError
+        
+        def failing_stream(*args, **kwargs):
+            yield "Partial answer"
+            raise LLMStreamError("Error: boom")
+        
+        with patch("noctem.wiki.query.get_context_for_query", return_value=("[1] ctx", [])), \
+             patch("noctem.wiki.query.stream_llm", side_effect=failing_stream) as mock_stream, \
+             patch("noctem.wiki.query.query_llm", return_value="Full answer [1].") as mock_llm:
+            first = ask("same question", on_token=lambda piece: None)
+            second = ask("same question")
+        
+        assert first.error == "Error: boom"
+        assert second.answer == "Full answer [1]."
+        assert mock_stream.call_count == 1 and mock_llm.call_count == 1
+    
+    def test_simple_search_cached(self):
+        """Repeated searches skip retrieval and return a fresh list."""
+        with patch("noctem.wiki.query.search", return_value=[]) as mock_search:
+            first = simple_search("topic")
+            second = simple_search("topic")
+        
+        assert mock_search.call_count == 1
+        assert first == second and first is not second
+
+
+class TestTokenBudget:
+    """Tests for fitting retrieved context into the model window."""
+    
+    def test_context_budget_subtracts_fixed_parts(self):
+        budget = TokenBudget(model_ctx=1000, response_buffer=100)
+        
+        remaining = budget.context_tokens("x" * 400, "y" * 400)
+        
+        assert 0 < remaining < 900
+        assert TokenBudget(model_ctx=10).context_tokens("sys", "frame") == 0
+    
+    def test_ask_caps_context_at_budget(self):
+        """A small window lowers the caller's max_context_tokens."""
+        with patch("noctem.wiki.query.get_context_for_query", return_value=("", [])) as mock_ctx:
+            ask("q", max_context_tokens=3000, budget=TokenBudget(model_ctx=1024))
+            small = mock_ctx.call_args.kwargs["max_tokens"]
+            ask("q", max_context_tokens=500, budget=TokenBudget(model_ctx=32768))
+            large = mock_ctx.call_args.kwargs["max_tokens"]
+        
+        assert small < 1024 - 400
+        assert large == 500
+    
+    def test_ask_requests_model_window(self):
+        """The window used for budgeting is the one requested from Ollama."""
+        with patch("noctem.wiki.query.get_context_for_query", return_value=("[1] ctx", [])), \
+             patch("noctem.wiki.query.query_llm", return_value="Answer [1].") as mock_llm:
+            ask("q", budget=TokenBudget(model_ctx=8192))
+        
+        assert mock_llm.call_args.kwargs["num_ctx"] == 8192
+    
+    def test_ask_spends_budget_with_same_counter(self):
+        """Retrieved chunks are measured with the counter used for the budget."""
+        from noctem.wiki.query import count_tokens
+        
+        with patch("noctem.wiki.query.get_context_for_query", return_value=("", [])) as mock_ctx:
+            ask("q")
+        
+        assert mock_ctx.call_args.kwargs["token_counter"] is count_tokens
+    
+    def test_encoder_loaded_on_first_count(self, monkeypatch):
+        """tiktoken's encoding is fetched lazily, once, and used for counts."""
+        from noctem.wiki import query
+        
+        fake_tiktoken = MagicMock()
+        fake_tiktoken.get_encoding.return_value.encode.side_effect = lambda text, **kw: text.split()
+        monkeypatch.setattr(query, "tiktoken", fake_tiktoken)
+        monkeypatch.setattr(query, "_encoder", None)
+        monkeypatch.setattr(query, "_encoder_loaded", False)
+        
+        assert query.count_tokens("three short words") == 3
+        assert query.count_tokens("two words") == 2
+        fake_tiktoken.get_encoding.assert_called_once_with("cl100k_base")
+
+
 class TestCheckWikiReady:
     """Tests for wiki readiness check."""
     
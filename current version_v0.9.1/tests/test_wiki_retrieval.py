@@ -10,6 +10,7 @@ from noctem.wiki.retrieval import (
     format_citation,
     extract_quote,
     get_wiki_stats,
+    invalidate_wiki_caches,
 )
 from noctem.models import Source, KnowledgeChunk
 
@@ -131,3 +132,193 @@ class TestWikiStats:
         assert "sources_by_trust" in stats
         
         assert isinstance(stats["total_chunks"], int)
+    
+    def test_get_wiki_stats_cached_until_invalidated(self):
+        """Counts are reused until a write invalidates them."""
+        invalidate_wiki_caches()
+        with patch("noctem.wiki.retrieval._count_wiki_contents", return_value={
+            "sources_by_status": {}, "total_chunks": 0, "sources_by_trust": {},
+        }) as count:
+            get_wiki_stats()
+            get_wiki_stats()
+            assert count.call_count == 1
+            
+            invalidate_wiki_caches()
+            get_wiki_stats()
+            assert count.call_count == 2
+        invalidate_wiki_caches()
+    
+    def test_create_source_invalidates_stats(self, tmp_path):
+        from noctem.wiki.ingestion import create_source, delete_source
+        
+        before = get_wiki_stats()["sources_by_status"].get("pending", 0)
+        path = tmp_path / "stats.txt"
+        path.write_text("Counted")
+        source = create_source(path)
+        
+        assert get_wiki_stats()["sources_by_status"].get("pending", 0) == before + 1
+        
+        delete_source(source.id)
+        assert get_wiki_stats()["sources_by_status"].get("pending", 0) == before
+
+
+class TestHybridSearch:
+    """Tests for BM25 keyword search and rank fusion."""
+    
+    @pytest.fixture
+    def indexed_chunks(self, tmp_path):
+        from noctem.wiki.chunking import TextChunk, save_chunks, delete_chunks_for_source
+        from noctem.wiki.ingestion import create_source
+        
+        path = tmp_path / "animals.txt"
+        path.write_text("notes", encoding="utf-8")
+        source = create_source(path)
+        chunks = save_chunks(source.id, [
+            TextChunk("The okapi is a giraffid.", None, 0, 0, 24, 6),
+            TextChunk("Capybaras enjoy warm water.", None, 1, 25, 52, 7),
+        ])
+        yield source, chunks
+        delete_chunks_for_source(source.id)
+    
+    def test_keyword_search_ranks_matching_chunk(self, indexed_chunks):
+        from noctem.wiki.retrieval import keyword_search
+        
+        source, chunks = indexed_chunks
+        
+        assert keyword_search("okapi habitat?") == [chunks[0].chunk_id]
+        assert keyword_search('okapi" OR *', source_ids=[source.id]) == [chunks[0].chunk_id]
+        assert keyword_search("???") == []
+    
+    def test_keyword_index_follows_deletes(self, indexed_chunks):
+        from noctem.wiki.chunking import delete_chunks_for_source
+        from noctem.wiki.retrieval import keyword_search
+        
+        source, _ = indexed_chunks
+        delete_chunks_for_source(source.id)
+        
+        assert keyword_search("okapi") == []
+    
+    def test_search_fuses_keyword_hits(self, indexed_chunks):
+        """Keyword-only hits join the dense results with their own similarity."""
+        from noctem.wiki import retrieval
+        
+        _, chunks = indexed_chunks
+        okapi, capybara = chunks
+        with patch.object(retrieval, "search_similar",
+                          return_value=[(capybara.chunk_id, 0.4, {})]), \
+             patch.object(retrieval, "score_chunk_ids",
+                          return_value={okapi.chunk_id: 0.3}) as mock_score:
+            results = retrieval.search("okapi", n_results=5)
+        
+        mock_score.assert_called_once()
+        scores = {r.chunk.chunk_id: r.similarity_score for r in results}
+        assert scores == {capybara.chunk_id: 0.4, okapi.chunk_id: 0.3}
+    
+    def test_search_dense_only_without_keyword_hits(self, indexed_chunks):
+        from noctem.wiki import retrieval
+        
+        _, chunks = indexed_chunks
+        with patch.object(retrieval, "search_similar",
+                          return_value=[(chunks[1].chunk_id, 0.4, {})]), \
+             patch.object(retrieval, "score_chunk_ids") as mock_score:
+            results = retrieval.search("zzzunmatched", n_results=5)
+        
+        mock_score.assert_not_called()
+        assert [r.chunk.chunk_id for r in results] == [chunks[1].chunk_id]
+    
+    def test_search_reuses_sources_until_invalidated(self, indexed_chunks):
+        """Repeated searches resolve each source once until a source write."""
+        from noctem.wiki import retrieval
+        from noctem.wiki.ingestion import update_source_status
+        
+        source, chunks = indexed_chunks
+        hits = [(chunks[0].chunk_id, 0.5, {})]
+        with patch.object(retrieval, "search_similar", return_value=hits), \
+             patch.object(retrieval, "get_sources_by_ids",
+                          wraps=retrieval.get_sources_by_ids) as fetch:
+            retrieval.search("okapi", n_results=5, hybrid=False)
+            retrieval.search("okapi", n_results=5, hybrid=False)
+            assert fetch.call_count == 1
+            
+            update_source_status(source.id, "indexed")
+            results = retrieval.search("okapi", n_results=5, hybrid=False)
+            assert fetch.call_count == 2
+        
+        assert results[0].source.status == "indexed"
+    
+    def test_cached_sources_expire_and_are_copies(self, indexed_chunks):
+        """Another process's writes show up after the TTL; callers can't edit the cache."""
+        from noctem.wiki import retrieval
+        
+        source, _ = indexed_chunks
+        invalidate_wiki_caches()
+        first = retrieval._get_sources_cached([source.id])[source.id]
+        first.title = "Changed by a caller"
+        
+        with patch.object(retrieval, "get_sources_by_ids",
+                          wraps=retrieval.get_sources_by_ids) as fetch:
+            again = retrieval._get_sources_cached([source.id])[source.id]
+            assert fetch.call_count == 0
+            assert again.title != "Changed by a caller"
+            
+            with patch.object(retrieval, "SOURCE_CACHE_TTL_SECONDS", 0):
+                retrieval._get_sources_cached([source.id])
+            assert fetch.call_count == 1
+
+
+class TestContextAssembly:
+    """Tests for building LLM context from search results."""
+    
+    def _result(self, chunk_id, content, file_name):
+        source = Source(id=1, file_path=f"/{file_name}", file_name=file_name, trust_level=1)
+        chunk = KnowledgeChunk(source_id=1, chunk_id=chunk_id, content=content, token_count=20)
+        return SearchResult(chunk=chunk, source=source, similarity_score=0.9,
+                            citation_ref=file_name)
+    
+    def test_near_duplicate_chunks_are_skipped(self):
+        from noctem.wiki import retrieval
+        
+        passage = ("Time blocking means giving every minute of the working day a job, "
+                   "planned in advance on paper and revised when the plan breaks.")
+        results = [
+            self._result("a", passage, "notes.md"),
+            self._result("b", passage + " ", "notes-copy.md"),
+            self._result("c", "Capybaras are large, social rodents of South America.", "zoo.md"),
+        ]
+        with patch.object(retrieval, "search", return_value=results):
+            context, used = retrieval.get_context_for_query("time blocking")
+        
+        assert [r.chunk.chunk_id for r in used] == ["a", "c"]
+        assert "[2] Source: zoo.md" in context
+        assert "notes-copy.md" not in context
+    
+    def test_over_budget_duplicate_does_not_end_assembly(self):
+        """A duplicate that would overflow the budget is skipped, not a stop."""
+        from noctem.wiki import retrieval
+        
+        passage = ("Time blocking means giving every minute of the working day a job, "
+                   "planned in advance on paper and revised when the plan breaks.")
+        duplicate = self._result("b", passage + " ", "notes-copy.md")
+        duplicate.chunk.token_count = 1000
+        results = [
+            self._result("a", passage, "notes.md"),
+            duplicate,
+            self._result("c", "Capybaras are large, social rodents of South America.", "zoo.md"),
+        ]
+        with patch.object(retrieval, "search", return_value=results):
+            _, used = retrieval.get_context_for_query("time blocking", max_tokens=100)
+        
+        assert [r.chunk.chunk_id for r in used] == ["a", "c"]
+    
+    def test_token_counter_overrides_stored_counts(self):
+        """A caller-supplied counter decides what fits in max_tokens."""
+        from noctem.wiki import retrieval
+        
+        results = [self._result("a", "Short stored count, long measured.", "notes.md")]
+        with patch.object(retrieval, "search", return_value=results):
+            _, stored = retrieval.get_context_for_query("q", max_tokens=100)
+            _, measured = retrieval.get_context_for_query(
+                "q", max_tokens=100, token_counter=lambda text: 500)
+        
+        assert len(stored) == 1
+        assert measured == []